@@ -0,0 +1,6 @@
+"""
+Benchmarks for cobalt's hot paths. These aren't run as part of the test suite,
+run them directly, eg::
+
+    python -m benchmarks.properties
+"""
@@ -0,0 +1,185 @@
+""" Generate large, realistic Akoma Ntoso acts for benchmarking.
+
+    python -m benchmarks.generate out.xml [--chapters N] [--parts N] [--sections N] ...
+
+The same parameters and seed always produce the same document.
+"""
+import argparse
+import random
+from copy import deepcopy
+from datetime import date, timedelta
+
+from lxml import etree
+
+from cobalt.act import Act, AmendmentEvent
+
+
+WORDS = ('the', 'of', 'and', 'a', 'to', 'in', 'is', 'any', 'person', 'council', 'shall', 'may', 'by-law',
+         'premises', 'owner', 'municipality', 'fire', 'safety', 'notice', 'period', 'within', 'must',
+         'officer', 'authorised', 'offence', 'fine', 'provision', 'section', 'subject', 'days', 'written')
+
+
+class Generator(object):
+    """ Builds an act with the given shape.
+
+    :param chapters: number of chapters in each part (or in the body, if there are no parts)
+    :param parts: number of parts in the body, or 0 for none
+    :param sections: number of sections in each chapter
+    :param schedules: number of schedules (components)
+    :param depth: levels of numbered paragraphs nested inside each subsection
+    :param amendments: number of amendment events
+    :param seed: random seed
+    """
+
+    def __init__(self, chapters=10, parts=0, sections=10, schedules=2, depth=2, amendments=5, seed=1):
+        self.chapters = chapters
+        self.parts = parts
+        self.sections = sections
+        self.schedules = schedules
+        self.depth = depth
+        self.amendments = amendments
+        self.rnd = random.Random(seed)
+
+    def act(self):
+        """ Generate an :class:`cobalt.act.Act`. """
+        act = Act.create(frbr_uri='/za-cpt/act/by-law/2009/fire-safety', title='Community Fire Safety By-law',
+                         work_date='2009-03-01', expression_date='2015-06-01', manifestation_date='2016-01-01')
+        act.publication_name = 'Provincial Gazette'
+        act.publication_number = '6651'
+        act.publication_date = '2009-03-01'
+
+        start = date(2010, 1, 1)
+        act.amendments = [AmendmentEvent(date=start + timedelta(days=90 * i),
+                                         amending_uri='/za-cpt/act/by-law/%d/amendment-%d' % (2010 + i // 4, i),
+                                         amending_title='Fire Safety Amendment By-law %d' % i)
+                          for i in range(self.amendments)]
+
+        self.ns = act.namespace
+        self.section_num = 0
+        body = self.element('body')
+        if self.parts:
+            for i in range(self.parts):
+                part = self.numbered(body, 'part', 'part-%d' % (i + 1), str(i + 1), heading=True)
+                self.add_chapters(part, 'part-%d.' % (i + 1))
+        else:
+            self.add_chapters(body, '')
+
+        act.body.getparent().replace(act.body, body)
+        self.add_schedules(act)
+
+        # reload so that the objectify tree is consistent, and set the schedule URIs
+        act = Act.from_bytes(etree.tostring(act.root, encoding='utf-8'))
+        act.frbr_uri = act.frbr_uri
+        return act
+
+    def xml(self):
+        """ Generate the XML of an act, as a string. """
+        return self.act().to_xml()
+
+    def add_chapters(self, parent, prefix):
+        for i in range(self.chapters):
+            chapter = self.numbered(parent, 'chapter', '%schapter-%d' % (prefix, i + 1), str(i + 1), heading=True)
+            for j in range(self.sections):
+                self.add_section(chapter)
+
+    def add_section(self, parent):
+        self.section_num += 1
+        num = str(self.section_num)
+        if self.rnd.random() < 0.05:
+            # eg. 12A
+            num += 'A'
+
+        section = self.numbered(parent, 'section', 'section-' + num, num + '.', heading=True)
+        for i in range(self.rnd.randint(1, 4)):
+            subsection = self.numbered(section, 'subsection', 'section-%s.%d' % (num, i + 1), '(%d)' % (i + 1))
+            self.add_content(subsection, subsection.get('id'), self.depth)
+
+    def add_content(self, parent, id, depth):
+        if depth and self.rnd.random() < 0.5:
+            intro = self.sub(parent, 'intro')
+            self.sub(intro, 'p').text = self.sentence()
+            for i in range(self.rnd.randint(2, 4)):
+                letter = 'abcdefghij'[i]
+                para = self.numbered(parent, 'paragraph', '%s.%s' % (id, letter), '(%s)' % letter)
+                self.add_content(para, para.get('id'), depth - 1)
+        else:
+            content = self.sub(parent, 'content')
+            for i in range(self.rnd.randint(1, 2)):
+                p = self.sub(content, 'p')
+                p.text = self.sentence()
+                if self.rnd.random() < 0.1:
+                    term = self.sub(p, 'term', refersTo='#term-' + self.word())
+                    term.text = self.word()
+                    term.tail = ' ' + self.sentence()
+
+    def add_schedules(self, act):
+        if not self.schedules:
+            return
+
+        components = self.element('components')
+        for i in range(self.schedules):
+            name = 'schedule%d' % (i + 1)
+            component = self.sub(components, 'component', id='component-%d' % (i + 1))
+            doc = self.sub(component, 'doc', name=name)
+
+            meta = self.sub(doc, 'meta')
+            meta.append(deepcopy(act.meta.identification))
+            work = meta.find('{*}identification/{*}FRBRWork')
+            work.find('{*}FRBRalias').set('value', 'Schedule %d' % (i + 1))
+            # the component name comes from this, the other URIs are set later
+            work.find('{*}FRBRthis').set('value', act.frbr_uri.work_uri() + '/' + name)
+
+            main = self.sub(doc, 'mainBody')
+            for j in range(self.sections):
+                self.add_section(main)
+
+        act.root.append(components)
+
+    def numbered(self, parent, tag, id, num, heading=False):
+        element = self.sub(parent, tag, id=id)
+        self.sub(element, 'num').text = num
+        if heading:
+            self.sub(element, 'heading').text = self.sentence(2, 6).capitalize()
+        return element
+
+    def element(self, tag, **attrs):
+        return etree.Element('{%s}%s' % (self.ns, tag), attrs, nsmap={None: self.ns})
+
+    def sub(self, parent, tag, **attrs):
+        return etree.SubElement(parent, '{%s}%s' % (self.ns, tag), attrs)
+
+    def word(self):
+        return self.rnd.choice(WORDS)
+
+    def sentence(self, lo=8, hi=30):
+        return ' '.join(self.word() for i in range(self.rnd.randint(lo, hi))) + '.'
+
+
+def generate(**kwargs):
+    """ Generate the XML of an act, see :class:`Generator` for the arguments. """
+    return Generator(**kwargs).xml()
+
+
+def add_arguments(parser):
+    parser.add_argument('--chapters', type=int, default=10)
+    parser.add_argument('--parts', type=int, default=0)
+    parser.add_argument('--sections', type=int, default=10)
+    parser.add_argument('--schedules', type=int, default=2)
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--amendments', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+
+
+def generator_kwargs(args):
+    return dict((k, getattr(args, k)) for k in ['chapters', 'parts', 'sections', 'schedules', 'depth',
+                                                'amendments', 'seed'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate an Akoma Ntoso act for benchmarking.')
+    parser.add_argument('output', help='file to write to')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with open(args.output, 'w') as f:
+        f.write(generate(**generator_kwargs(args)))
@@ -0,0 +1,74 @@
+""" Compare lean (plain lxml.etree) documents with objectify documents: the time taken to parse
+a document, read its metadata properties and build its table of contents, and the memory used
+by a loaded document and its table of contents.
+
+    python -m benchmarks.lean [generator options]
+"""
+import os
+import sys
+import json
+import argparse
+import resource
+
+from cobalt.act import Act
+
+from .generate import Generator, add_arguments, generator_kwargs
+from .suite import measure_in_child
+
+
+# (label, objectify benchmark, lean benchmark), see benchmarks.suite
+PAIRS = [
+    ('parse', 'load.from_bytes', 'load.lean'),
+    ('properties', 'properties', 'properties.lean'),
+    ('table_of_contents', 'table_of_contents', 'table_of_contents.lean'),
+]
+
+
+def resident_kb(xml, lean):
+    """ The growth in peak resident memory, in KB, from loading ``xml`` and building its table
+    of contents, measured in a forked child process. """
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # child
+        os.close(read)
+        start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        act = Act.from_bytes(xml, lean=lean)
+        # keep the table of contents alive until the memory is measured
+        act.toc = act.table_of_contents()
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start
+        if sys.platform == 'darwin':
+            # bytes, not KB
+            peak //= 1024
+        with os.fdopen(write, 'w') as f:
+            json.dump(peak, f)
+        del act
+        os._exit(0)
+
+    os.close(write)
+    with os.fdopen(read) as f:
+        data = f.read()
+    os.waitpid(pid, 0)
+    return json.loads(data)
+
+
+def run(kwargs):
+    xml = Generator(**kwargs).xml()
+    print "document: %d bytes" % len(xml)
+    print "%-20s %14s %14s %8s" % ('', 'objectify us', 'lean us', 'speedup')
+
+    for label, full, lean in PAIRS:
+        a = measure_in_child(full, xml)['seconds']
+        b = measure_in_child(lean, xml)['seconds']
+        print "%-20s %14.1f %14.1f %7.2fx" % (label, a * 1e6, b * 1e6, a / b)
+
+    if hasattr(os, 'fork'):
+        a = resident_kb(xml, False)
+        b = resident_kb(xml, True)
+        print "%-20s %11d KB %11d KB %7.2fx" % ('resident memory', a, b, float(a) / b if b else 0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare lean and objectify documents.')
+    add_arguments(parser)
+    run(generator_kwargs(parser.parse_args()))
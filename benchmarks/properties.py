@@ -0,0 +1,47 @@
+""" Time reading Act metadata properties with and without the cached element handles.
+
+    python -m benchmarks.properties [iterations]
+"""
+import sys
+import timeit
+
+from cobalt.act import Act, AmendmentEvent
+
+
+PROPERTIES = ['title', 'work_date', 'expression_date', 'manifestation_date', 'language',
+              'publication_name', 'publication_date', 'publication_number', 'frbr_uri',
+              'year', 'number', 'nature']
+
+
+def make_act():
+    act = Act.create(frbr_uri='/za/act/2010/5', title='Benchmark Act', expression_date='2012-01-01')
+    act.publication_name = 'Government Gazette'
+    act.publication_date = '2010-02-01'
+    act.publication_number = '1234'
+    act.amendments = [AmendmentEvent(date='2012-01-01', amending_uri='/za/act/2011/1', amending_title='Amendment')]
+    return act
+
+
+def run(iterations=20000):
+    act = make_act()
+    # cost of just clearing the caches, which is subtracted from the uncached times
+    baseline = min(timeit.repeat(act.clear_caches, number=iterations, repeat=3))
+
+    print "%-20s %12s %12s %8s" % ('property', 'cached us', 'uncached us', 'speedup')
+    for prop in PROPERTIES:
+        def cached():
+            getattr(act, prop)
+
+        def uncached():
+            act.clear_caches()
+            getattr(act, prop)
+
+        warm = min(timeit.repeat(cached, number=iterations, repeat=3))
+        cold = min(timeit.repeat(uncached, number=iterations, repeat=3)) - baseline
+
+        print "%-20s %12.2f %12.2f %7.1fx" % (
+            prop, warm / iterations * 1e6, cold / iterations * 1e6, cold / warm)
+
+
+if __name__ == '__main__':
+    run(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,24 @@
+""" Compare rendering many documents serially, with threads and with processes.
+
+    python -m benchmarks.render act.xml [copies] [workers]
+"""
+import sys
+
+from cobalt.render import HTMLRenderer
+
+
+def run(fname, copies=20, workers=None):
+    renderer = HTMLRenderer()
+    items = [fname] * copies
+
+    for label, kwargs in [('serial', {'workers': 0}),
+                          ('threads', {'workers': workers}),
+                          ('processes', {'workers': workers, 'processes': True})]:
+        results = renderer.render_many(items, **kwargs)
+        for html in results:
+            pass
+        print "%-10s %6.1f documents/s" % (label, results.rate)
+
+
+if __name__ == '__main__':
+    run(sys.argv[1], *[int(x) for x in sys.argv[2:]])
@@ -0,0 +1,48 @@
+""" Time resolving URIs against a large Resolver.
+
+    python -m benchmarks.resolver [expressions] [lookups]
+"""
+import random
+import sys
+import time
+
+from cobalt.resolver import Resolver
+from cobalt.uri import FrbrUri
+
+
+def run(expressions=1000000, lookups=100000, seed=1):
+    rnd = random.Random(seed)
+    resolver = Resolver()
+    works = []
+
+    start = time.time()
+    while len(resolver) < expressions:
+        work = '/za-%d/act/by-law/%d/%d' % (rnd.randint(1, 50), rnd.randint(1950, 2015), len(works))
+        works.append(work)
+        for i in range(rnd.randint(1, 10)):
+            uri = FrbrUri.parse(work)
+            uri.expression_date = '@%d-%02d-01' % (rnd.randint(2000, 2015), rnd.randint(1, 12))
+            resolver.add(uri, len(resolver))
+    print "built %d expressions of %d works in %.2fs" % (len(resolver), len(works), time.time() - start)
+
+    queries = []
+    for i in range(lookups):
+        work = rnd.choice(works)
+        queries.append(rnd.choice([
+            work + '/eng:%d-06-01/main/section/%d' % (rnd.randint(2000, 2015), rnd.randint(1, 50)),
+            work + '/eng@',
+            work,
+        ]))
+    parsed = [FrbrUri.parse(q, frozen=True) for q in queries]
+
+    for label, items in [('strings', queries), ('parsed', parsed)]:
+        resolve = resolver.resolve
+        start = time.time()
+        for q in items:
+            resolve(q)
+        taken = time.time() - start
+        print "resolve %-8s %.2f us/lookup" % (label, taken / lookups * 1e6)
+
+
+if __name__ == '__main__':
+    run(*[int(x) for x in sys.argv[1:]])
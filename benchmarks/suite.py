@@ -0,0 +1,298 @@
+""" Benchmark the hot paths of cobalt against a generated act, recording the time and peak memory
+of each benchmark in a JSON results file that can be compared across commits.
+
+    python -m benchmarks.suite [--output results.json] [--compare old.json] [--only NAME] [generator options]
+
+Each benchmark runs in a forked child process, so that caches and memory use don't leak from one
+benchmark to the next. Peak memory is the growth in the child's maximum resident set size while the
+benchmark runs, and is only available on platforms with ``fork``.
+"""
+import os
+import sys
+import json
+import time
+import timeit
+import argparse
+import resource
+import subprocess
+from collections import OrderedDict
+
+from cobalt.act import Act
+from cobalt.uri import FrbrUri, _parse_cache
+from cobalt.render import HTMLRenderer
+from cobalt.toc import TOCCache
+
+from .generate import Generator, add_arguments, generator_kwargs
+from .properties import PROPERTIES
+
+
+# name -> function(xml) returning a function to time
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+@benchmark('load')
+def load(xml):
+    return lambda: Act(xml)
+
+
+@benchmark('load.from_bytes')
+def load_from_bytes(xml):
+    return lambda: Act.from_bytes(xml)
+
+
+@benchmark('load.lean')
+def load_lean(xml):
+    return lambda: Act.from_bytes(xml, lean=True)
+
+
+@benchmark('load.meta')
+def load_meta(xml):
+    return lambda: Act.load_meta(xml)
+
+
+@benchmark('load.meta.main')
+def load_meta_main(xml):
+    return lambda: Act.load_meta(xml, components=False)
+
+
+def property_benchmark(prop):
+    def setup(xml):
+        act = Act(xml)
+
+        def run():
+            act.clear_caches()
+            getattr(act, prop)
+        return run
+    return setup
+
+
+for prop in PROPERTIES + ['amendments', 'repeal']:
+    benchmark('property.' + prop)(property_benchmark(prop))
+
+
+def properties_benchmark(lean):
+    def setup(xml):
+        act = Act.from_bytes(xml, lean=lean)
+
+        def run():
+            act.clear_caches()
+            for prop in PROPERTIES:
+                getattr(act, prop)
+        return run
+    return setup
+
+
+benchmark('properties')(properties_benchmark(False))
+benchmark('properties.lean')(properties_benchmark(True))
+
+
+@benchmark('frbr_uri.assign')
+def frbr_uri_assign(xml):
+    act = Act(xml)
+    uris = ['/za/act/2010/1', '/za-cpt/act/by-law/2009/fire-safety']
+
+    def run():
+        uris.reverse()
+        act.frbr_uri = uris[0]
+    return run
+
+
+@benchmark('table_of_contents')
+def table_of_contents(xml):
+    act = Act(xml)
+    return act.table_of_contents
+
+
+@benchmark('table_of_contents.lean')
+def table_of_contents_lean(xml):
+    act = Act.from_bytes(xml, lean=True)
+    return act.table_of_contents
+
+
+@benchmark('table_of_contents.as_dict')
+def table_of_contents_as_dict(xml):
+    toc = Act(xml).table_of_contents()
+    return lambda: json.dumps([item.as_dict() for item in toc])
+
+
+@benchmark('table_of_contents.json')
+def table_of_contents_json(xml):
+    toc = Act(xml).table_of_contents()
+    return toc.to_json
+
+
+@benchmark('table_of_contents.detach')
+def table_of_contents_detach(xml):
+    toc = Act(xml).table_of_contents()
+    return toc.detach
+
+
+@benchmark('table_of_contents.cached')
+def table_of_contents_cached(xml):
+    tocs = TOCCache()
+    tocs.json(xml)
+    return lambda: tocs.json(xml)
+
+
+@benchmark('get_subcomponent.cold')
+def get_subcomponent_cold(xml):
+    act = Act(xml)
+
+    def run():
+        act.clear_caches()
+        act.get_subcomponent('main', 'section/10')
+    return run
+
+
+@benchmark('get_subcomponent.warm')
+def get_subcomponent_warm(xml):
+    act = Act(xml)
+    act.get_subcomponent('main', 'section/10')
+    return lambda: act.get_subcomponent('main', 'section/10')
+
+
+@benchmark('uri.parse.cold')
+def uri_parse_cold(xml):
+    def run():
+        _parse_cache.clear()
+        FrbrUri.parse('/za-cpt/act/by-law/2009/fire-safety/eng:2015-06-01/main/part/A')
+    return run
+
+
+@benchmark('uri.parse.warm')
+def uri_parse_warm(xml):
+    return lambda: FrbrUri.parse('/za-cpt/act/by-law/2009/fire-safety/eng:2015-06-01/main/part/A')
+
+
+@benchmark('render')
+def render(xml):
+    act = Act(xml)
+    renderer = HTMLRenderer()
+    return lambda: renderer.render(act.root)
+
+
+def measure(setup, xml, min_time=0.2, repeat=3):
+    """ Time the function returned by ``setup(xml)``, returning a dict with the best time per call
+    in seconds, the number of calls per repeat, and the peak memory growth in KB. """
+    func = setup(xml)
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # run enough times to take at least min_time
+    taken = timeit.timeit(func, number=1)
+    number = max(1, int(min_time / taken)) if taken else 1000
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start_rss
+    if sys.platform == 'darwin':
+        # bytes, not KB
+        peak //= 1024
+
+    return {'seconds': best, 'number': number, 'peak_kb': peak}
+
+
+def measure_in_child(name, xml):
+    if not hasattr(os, 'fork'):
+        result = measure(BENCHMARKS[name], xml)
+        result['peak_kb'] = None
+        return result
+
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # child
+        os.close(read)
+        try:
+            result = measure(BENCHMARKS[name], xml)
+        except Exception as e:
+            result = {'error': '%s: %s' % (e.__class__.__name__, e)}
+        with os.fdopen(write, 'w') as f:
+            json.dump(result, f)
+        os._exit(0)
+
+    os.close(write)
+    with os.fdopen(read) as f:
+        data = f.read()
+    os.waitpid(pid, 0)
+    return json.loads(data)
+
+
+def git_revision():
+    try:
+        with open(os.devnull, 'w') as devnull:
+            return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=devnull).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(kwargs, only=None):
+    xml = Generator(**kwargs).xml()
+    results = OrderedDict()
+
+    for name in BENCHMARKS:
+        if only and not any(name.startswith(o) for o in only):
+            continue
+        results[name] = result = measure_in_child(name, xml)
+        print_result(name, result)
+
+    return {
+        'revision': git_revision(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'generator': kwargs,
+        'document_bytes': len(xml),
+        'results': results,
+    }
+
+
+def print_result(name, result, old=None):
+    if 'error' in result:
+        print "%-32s %s" % (name, result['error'])
+        return
+
+    peak = result['peak_kb'] if result['peak_kb'] is not None else '-'
+    line = "%-32s %12.1f us %10s KB" % (name, result['seconds'] * 1e6, peak)
+    if old and 'seconds' in old:
+        line += "  %6.2fx" % (result['seconds'] / old['seconds'])
+    print line
+
+
+def compare(old, new):
+    """ Print the results in ``new`` next to the ratio of their time to the time in ``old``. """
+    print "%s (%s) vs %s (%s)" % (new.get('revision'), new['time'], old.get('revision'), old['time'])
+    if old['generator'] != new['generator']:
+        print "warning: the documents were generated with different options"
+
+    for name, result in new['results'].iteritems():
+        print_result(name, result, old['results'].get(name))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark cobalt.')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='compare the results with those in this JSON file')
+    parser.add_argument('--only', action='append', help='only run benchmarks whose names start with this')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    results = run(generator_kwargs(args), only=args.only)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f, object_pairs_hook=OrderedDict)
+        print
+        compare(old, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+""" Compare FrbrUri.parse_many with calling FrbrUri.parse for each URI.
+
+    python -m benchmarks.uri [count]
+"""
+import random
+import sys
+import time
+
+from cobalt.uri import FrbrUri, _parse_cache
+
+
+def make_uris(count, seed=1):
+    rnd = random.Random(seed)
+    uris = []
+    for i in range(count):
+        place = rnd.choice(['za', 'za-jhb', 'za-cpt', 'zm'])
+        subtype = rnd.choice(['', 'by-law/', 'gn/'])
+        uri = '/%s/act/%s%d/%d' % (place, subtype, rnd.randint(1950, 2015), rnd.randint(1, 200))
+
+        kind = rnd.random()
+        if kind < 0.3:
+            uri += '/eng@%d-01-01' % rnd.randint(2000, 2015)
+        elif kind < 0.5:
+            uri += '/eng:%d-01-01/main/section/%d' % (rnd.randint(2000, 2015), rnd.randint(1, 100))
+        elif kind < 0.6:
+            uri += '/eng/main.xml'
+        elif kind < 0.65:
+            uri = uri.replace('/act/', '/')
+        uris.append(uri)
+    return uris
+
+
+def loop(uris):
+    result = []
+    for uri in uris:
+        try:
+            result.append(FrbrUri.parse(uri))
+        except ValueError:
+            result.append(None)
+    return result
+
+
+def run(count=200000):
+    uris = make_uris(count)
+
+    _parse_cache.clear()
+    start = time.time()
+    loop(uris)
+    looped = time.time() - start
+
+    start = time.time()
+    columns = FrbrUri.parse_many(uris)
+    many = time.time() - start
+
+    print "%d URIs, %d valid" % (count, sum(columns.valid))
+    print "FrbrUri.parse loop:    %.3fs (%.2f us/uri)" % (looped, looped / count * 1e6)
+    print "FrbrUri.parse_many:    %.3fs (%.2f us/uri)" % (many, many / count * 1e6)
+    print "speedup: %.1fx" % (looped / many)
+
+
+if __name__ == '__main__':
+    run(*[int(x) for x in sys.argv[1:]])
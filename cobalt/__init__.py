@@ -1,4 +1,4 @@
 from .act import Act, AmendmentEvent, RepealEvent
-from .uri import FrbrUri
+from .uri import FrbrUri, FrozenFrbrUri
 
-__all__ = [Act, FrbrUri, AmendmentEvent, RepealEvent]
+__all__ = [Act, FrbrUri, FrozenFrbrUri, AmendmentEvent, RepealEvent]
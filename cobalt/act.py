@@ -1,12 +1,21 @@
 import re
+import gzip
+import mmap
+import threading
+from io import BytesIO
+from contextlib import contextmanager
 from collections import OrderedDict
+from copy import deepcopy
+
+from datetime import date
 
 from lxml import objectify
 from lxml import etree
-import arrow
 
-from .uri import FrbrUri
+from . import instrument
+from .uri import FrbrUri, FrozenFrbrUri
 from .toc import TOCBuilder
+from .xpath import xpaths
 
 
 ENCODING_RE = re.compile('encoding="[\w-]+"')
@@ -14,6 +23,63 @@ ENCODING_RE = re.compile('encoding="[\w-]+"')
 DATE_FORMAT = "%Y-%m-%d"
 
 
+# parsed dates, keyed by string, see parse_date
+_date_cache = {}
+DATE_CACHE_SIZE = 4096
+
+
+def parse_date(value):
+    """ Parse an Akoma Ntoso date string, such as ``2012-01-02``, into a :class:`datetime.date`.
+
+    Dates are almost always ``YYYY-MM-DD``, which are parsed directly. Anything else
+    is given to `arrow <http://crsmithdev.com/arrow/>`_. Parsed dates are remembered, since
+    documents tend to use the same dates over and over.
+    """
+    try:
+        return _date_cache[value]
+    except KeyError:
+        pass
+
+    try:
+        if len(value) != 10 or value[4] != '-' or value[7] != '-':
+            raise ValueError()
+        result = date(int(value[:4]), int(value[5:7]), int(value[8:]))
+    except ValueError:
+        import arrow
+        result = arrow.get(value).date()
+
+    if len(_date_cache) >= DATE_CACHE_SIZE:
+        _date_cache.clear()
+    _date_cache[value] = result
+
+    return result
+
+
+# parsers for each thread, see get_parser
+_local = threading.local()
+
+
+def get_parser(remove_blank_text=True, lean=False, huge_tree=False):
+    """ Get an objectify parser for Akoma Ntoso documents. Parsers are re-used, and each
+    thread has its own parsers since lxml parsers can't be used by two threads at once.
+
+    :param remove_blank_text: discard whitespace-only text between elements?
+    :param lean: get a plain :mod:`lxml.etree` parser instead, see :class:`Act`
+    :param huge_tree: turn off libxml2's limits on the depth of the tree and the size of
+                      text nodes, for very large documents. Only use this for trusted documents.
+    """
+    parsers = getattr(_local, 'parsers', None)
+    if parsers is None:
+        parsers = _local.parsers = {}
+
+    key = (remove_blank_text, lean, huge_tree)
+    parser = parsers.get(key)
+    if parser is None:
+        make = etree.XMLParser if lean else objectify.makeparser
+        parser = parsers[key] = make(remove_blank_text=remove_blank_text, huge_tree=huge_tree)
+    return parser
+
+
 def datestring(value):
     if value is None:
         return ""
@@ -24,17 +90,28 @@ def datestring(value):
 
 
 class Base(object):
-    def __init__(self, xml=None):
-        encoding = ENCODING_RE.search(xml, 0, 200)
-        if encoding:
+    def __init__(self, xml=None, lean=False):
+        if isinstance(xml, unicode) and ENCODING_RE.search(xml, 0, 200):
             # lxml doesn't like unicode strings with an encoding element, so
             # change to bytes
             xml = xml.encode('utf-8')
 
-        self.root = objectify.fromstring(xml)
+        start = instrument.clock() if instrument.hooks else None
+        root = etree.fromstring(xml, get_parser(lean=lean))
+        if start is not None:
+            instrument.notify('act.parse', start, size=len(xml), node=root)
+
+        self._init_root(root)
+
+    def _init_root(self, root):
+        self.root = root
         self.namespace = self.root.nsmap[None]
+        self._xpaths = xpaths(self.namespace)
+        # a plain lxml.etree tree, rather than an objectify one?
+        self.lean = not isinstance(root, objectify.ObjectifiedElement)
 
-        self._maker = objectify.ElementMaker(annotate=False, namespace=self.namespace, nsmap=self.root.nsmap)
+        if not self.lean:
+            self._maker = objectify.ElementMaker(annotate=False, namespace=self.namespace, nsmap=self.root.nsmap)
         # the "source" attribute used on some elements where it is required.
         # contains: name, id, url
         self.source = ["cobalt", "cobalt", "https://github.com/Code4SA/cobalt"]
@@ -58,59 +135,216 @@ class Act(Base):
     :ivar root: :class:`lxml.objectify.ObjectifiedElement` root of the XML document
     :ivar meta: :class:`lxml.objectify.ObjectifiedElement` meta element
     :ivar body: :class:`lxml.objectify.ObjectifiedElement` body element
+    :ivar lean: is this a lean document?
+
+    Documents are parsed with :mod:`lxml.objectify` by default. Lean documents, loaded with
+    ``lean=True``, are plain :mod:`lxml.etree` trees instead, which are quicker to parse
+    and use less memory. All the properties and methods of this class work the same way
+    for both, but elements of lean documents don't support objectify's attribute-style
+    access to their children, such as ``act.meta.identification``. Use lean documents
+    when the XML is only read, for example for serving, indexing or tables of contents.
 
     .. seealso::
         http://www.akomantoso.org/docs/akoma-ntoso-user-documentation/metadata-describes-the-content
     """
 
-    def __init__(self, xml=None):
-        """ Setup a new instance with the string in `xml`. """
+    # see batch
+    _batch_depth = 0
+    _uris_stale = False
+
+    def __init__(self, xml=None, lean=False):
+        """ Setup a new instance with the string in `xml`. If `lean` is True,
+        the document is a plain :mod:`lxml.etree` tree. """
         if not xml:
-            # use an empty document
-            xml = EMPTY_DOCUMENT
-        super(Act, self).__init__(xml)
+            # use a copy of the pre-parsed empty document
+            self._init_root(deepcopy(EMPTY_DOCUMENT_ETREE if lean else EMPTY_DOCUMENT_TREE))
+        else:
+            super(Act, self).__init__(xml, lean)
 
-        self.act = self.root.act
-        self.meta = self.act.meta
-        self.body = self.act.body
+    @classmethod
+    def from_file(cls, source, remove_blank_text=True, lean=False, huge_tree=False):
+        """ Load a document from a file. The file is parsed as it is read, so its contents are
+        never held in memory as a string.
+
+        :param source: a filename or an open file
+        :param remove_blank_text: discard whitespace-only text between elements?
+        :param lean: load a lean document?
+        :param huge_tree: allow very large and deeply nested documents, see :func:`get_parser`
+        """
+        start = instrument.clock() if instrument.hooks else None
+        root = etree.parse(source, get_parser(remove_blank_text, lean, huge_tree)).getroot()
+        if start is not None:
+            instrument.notify('act.parse', start, node=root)
+
+        return cls._from_root(root)
+
+    @classmethod
+    def from_bytes(cls, xml, remove_blank_text=True, lean=False, huge_tree=False):
+        """ Load a document from a string of encoded XML, which is parsed as-is, without being
+        copied or re-encoded.
+
+        :param xml: bytes (``str``) of XML
+        :param remove_blank_text: discard whitespace-only text between elements?
+        :param lean: load a lean document?
+        :param huge_tree: allow very large and deeply nested documents, see :func:`get_parser`
+        """
+        start = instrument.clock() if instrument.hooks else None
+        root = etree.fromstring(xml, get_parser(remove_blank_text, lean, huge_tree))
+        if start is not None:
+            instrument.notify('act.parse', start, size=len(xml), node=root)
+
+        return cls._from_root(root)
+
+    @classmethod
+    def from_mmap(cls, filename, remove_blank_text=True, lean=False, huge_tree=False):
+        """ Load a document from a file by memory-mapping it. The parser reads directly from
+        the mapped pages, so the only copy of the raw document is in the operating system's page cache,
+        which is shared with other processes reading the same file.
+
+        :param filename: the name of the file
+        :param remove_blank_text: discard whitespace-only text between elements?
+        :param lean: load a lean document?
+        :param huge_tree: allow very large and deeply nested documents, see :func:`get_parser`
+        """
+        with open(filename, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls.from_file(data, remove_blank_text, lean, huge_tree)
+        finally:
+            data.close()
+
+    @classmethod
+    def _from_root(cls, root):
+        act = cls.__new__(cls)
+        act._init_root(root)
+        return act
+
+    def _init_root(self, root):
+        super(Act, self)._init_root(root)
+        self.act = self._xpaths.first(self._xpaths.act, self.root)
+        self.meta = self._get('meta', root=self.act)
+        self.body = self._get('body', root=self.act)
+        self.clear_caches()
+
+    @classmethod
+    def load_meta(cls, source, components=True, lean=False):
+        """ Load only the metadata of a document, without building the body.
+
+        This is much cheaper than creating a full :class:`Act` when only the
+        metadata properties (such as :data:`title`, :data:`frbr_uri` or :data:`amendments`)
+        are needed. Parsing stops as soon as the ``meta`` element of the act has been read.
+        If ``components`` is True, the body of the act is skipped without being parsed and
+        then the components are parsed, discarding their content as it is read, so the cost
+        grows with the size of the components rather than of the whole document.
+
+        :param source: a filename, or a string of XML
+        :param components: should the metadata for components (eg. schedules) also be loaded?
+        :param lean: load a lean document? See :class:`Act`.
+        :rtype: :class:`ActMeta`
+        """
+        return ActMeta(source, components=components, lean=lean)
+
+    @classmethod
+    def create(cls, frbr_uri=None, title=None, work_date=None, expression_date=None,
+               manifestation_date=None, language=None):
+        """ Create a new, empty act with the given metadata.
+
+        This is quicker than creating an empty act and then setting each property, because
+        the FRBR URIs of the document are only calculated once.
+
+        :param frbr_uri: work FRBR URI, as a string or a :class:`cobalt.uri.FrbrUri`
+        :param title: short title
+        :param work_date: date of the FRBRWork element
+        :param expression_date: date of the FRBRExpression element
+        :param manifestation_date: date of the FRBRManifestation element
+        :param language: three-letter ISO-639-2 language code
+        :rtype: :class:`Act`
+        """
+        fields = dict(frbr_uri=frbr_uri, title=title, work_date=work_date, expression_date=expression_date,
+                      manifestation_date=manifestation_date, language=language)
+        act = cls()
+        act.update(**dict((k, v) for k, v in fields.iteritems() if v is not None))
+        return act
+
+    @contextmanager
+    def batch(self):
+        """ A context manager for changing many metadata properties at once. Changes to
+        :data:`frbr_uri`, :data:`expression_date` and :data:`language` all require the FRBR URIs of
+        every component to be re-calculated, which is only done once at the end of the batch::
+
+            >>> with act.batch():
+            ...     act.frbr_uri = '/za/act/2010/1'
+            ...     act.language = 'fre'
+            ...     act.expression_date = '2012-01-01'
+
+        Batches can be nested, the URIs are updated when the outermost batch ends.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._uris_stale:
+                self._uris_stale = False
+                self.frbr_uri = self.frbr_uri
+
+    def update(self, **fields):
+        """ Set many metadata properties at once, in a :meth:`batch`::
+
+            >>> act.update(title='Fire Safety By-law', language='afr', expression_date='2015-01-01')
+
+        :param fields: property names and their new values, such as ``title`` or ``publication_date``
+        """
+        with self.batch():
+            for name, value in fields.iteritems():
+                prop = getattr(self.__class__, name, None)
+                if not isinstance(prop, property) or prop.fset is None:
+                    raise TypeError("Can't update %s, it isn't a settable property" % name)
+                prop.fset(self, value)
+
+    def _update_uris(self):
+        # update the URIs of all the components, or remember to do it at the end of a batch
+        if self._batch_depth:
+            self._uris_stale = True
+        else:
+            self.frbr_uri = self.frbr_uri
 
     @property
     def title(self):
         """ Short title """
-        return self.meta.identification.FRBRWork.FRBRalias.get('value')
+        return self._get('meta.identification.FRBRWork.FRBRalias').get('value')
 
     @title.setter
     def title(self, value):
-        self.meta.identification.FRBRWork.FRBRalias.set('value', value)
+        self._get('meta.identification.FRBRWork.FRBRalias').set('value', value)
 
     @property
     def work_date(self):
         """ Date from the FRBRWork element """
-        return arrow.get(self.meta.identification.FRBRWork.FRBRdate.get('date')).date()
+        return parse_date(self._get('meta.identification.FRBRWork.FRBRdate').get('date'))
 
     @work_date.setter
     def work_date(self, value):
-        self.meta.identification.FRBRWork.FRBRdate.set('date', datestring(value))
+        self._get('meta.identification.FRBRWork.FRBRdate').set('date', datestring(value))
 
     @property
     def expression_date(self):
         """ Date from the FRBRExpression element """
-        return arrow.get(self.meta.identification.FRBRExpression.FRBRdate.get('date')).date()
+        return parse_date(self._get('meta.identification.FRBRExpression.FRBRdate').get('date'))
 
     @expression_date.setter
     def expression_date(self, value):
-        self.meta.identification.FRBRExpression.FRBRdate.set('date', datestring(value))
-        # update the URI
-        self.frbr_uri = self.frbr_uri
+        self._get('meta.identification.FRBRExpression.FRBRdate').set('date', datestring(value))
+        self._update_uris()
 
     @property
     def manifestation_date(self):
         """ Date from the FRBRManifestation element """
-        return arrow.get(self.meta.identification.FRBRManifestation.FRBRdate.get('date')).date()
+        return parse_date(self._get('meta.identification.FRBRManifestation.FRBRdate').get('date'))
 
     @manifestation_date.setter
     def manifestation_date(self, value):
-        self.meta.identification.FRBRManifestation.FRBRdate.set('date', datestring(value))
+        self._get('meta.identification.FRBRManifestation.FRBRdate').set('date', datestring(value))
 
     @property
     def publication_name(self):
@@ -121,7 +355,7 @@ class Act(Base):
     @publication_name.setter
     def publication_name(self, value):
         value = value or ""
-        pub = self._ensure('meta.publication', after=self.meta.identification)
+        pub = self._ensure('meta.publication', after=self._get('meta.identification'))
         pub.set('name', value)
         pub.set('showAs', value)
 
@@ -130,12 +364,12 @@ class Act(Base):
         """ Date of the publication """
         pub = self._get('meta.publication')
         if pub is not None and pub.get('date'):
-            return arrow.get(pub.get('date')).date()
+            return parse_date(pub.get('date'))
         return None
 
     @publication_date.setter
     def publication_date(self, value):
-        self._ensure('meta.publication', after=self.meta.identification)\
+        self._ensure('meta.publication', after=self._get('meta.identification'))\
             .set('date', datestring(value))
 
     @property
@@ -146,24 +380,23 @@ class Act(Base):
 
     @publication_number.setter
     def publication_number(self, value):
-        self._ensure('meta.publication', after=self.meta.identification)\
+        self._ensure('meta.publication', after=self._get('meta.identification'))\
             .set('number', value or "")
 
     @property
     def language(self):
         """ The 3-letter ISO-639-2 language code of this document """
-        return self.meta.identification.FRBRExpression.FRBRlanguage.get('language', 'eng')
+        return self._get('meta.identification.FRBRExpression.FRBRlanguage').get('language', 'eng')
 
     @language.setter
     def language(self, value):
-        self.meta.identification.FRBRExpression.FRBRlanguage.set('language', value)
-        # update the URI
-        self.frbr_uri = self.frbr_uri
+        self._get('meta.identification.FRBRExpression.FRBRlanguage').set('language', value)
+        self._update_uris()
 
     @property
     def frbr_uri(self):
         """ The FRBR Work URI as a :class:`FrbrUri` instance that uniquely identifies this document universally. """
-        uri = self.meta.identification.FRBRWork.FRBRuri.get('value')
+        uri = self._get('meta.identification.FRBRWork.FRBRuri').get('value')
         if uri:
             return FrbrUri.parse(uri)
         else:
@@ -173,8 +406,17 @@ class Act(Base):
     def frbr_uri(self, uri):
         if not isinstance(uri, FrbrUri):
             uri = FrbrUri.parse(uri)
+        elif isinstance(uri, FrozenFrbrUri):
+            # the expression details are filled in below
+            uri = uri.clone()
 
-        uri.language = self.meta.identification.FRBRExpression.FRBRlanguage.get('language', 'eng')
+        if self._batch_depth:
+            # only set the work URI now, the rest is done at the end of the batch
+            self._get('meta.identification.FRBRWork.FRBRuri').set('value', uri.uri())
+            self._uris_stale = True
+            return
+
+        uri.language = self._get('meta.identification.FRBRExpression.FRBRlanguage').get('language', 'eng')
         uri.expression_date = '@' + datestring(self.expression_date)
 
         if uri.work_component is None:
@@ -183,32 +425,40 @@ class Act(Base):
         # set URIs of the main document and components
         for component, element in self.components().iteritems():
             uri.work_component = component
-            ident = element.find('.//{*}meta/{*}identification')
+            ident = self._xpaths.first(self._xpaths.identification, element)
 
-            ident.FRBRWork.FRBRuri.set('value', uri.uri())
-            ident.FRBRWork.FRBRthis.set('value', uri.work_uri())
-            ident.FRBRWork.FRBRcountry.set('value', uri.country)
+            self._get('FRBRWork.FRBRuri', ident).set('value', uri.uri())
+            self._get('FRBRWork.FRBRthis', ident).set('value', uri.work_uri())
+            self._get('FRBRWork.FRBRcountry', ident).set('value', uri.country)
 
-            ident.FRBRExpression.FRBRuri.set('value', uri.expression_uri(False))
-            ident.FRBRExpression.FRBRthis.set('value', uri.expression_uri())
+            self._get('FRBRExpression.FRBRuri', ident).set('value', uri.expression_uri(False))
+            self._get('FRBRExpression.FRBRthis', ident).set('value', uri.expression_uri())
 
-            ident.FRBRManifestation.FRBRuri.set('value', uri.expression_uri(False))
-            ident.FRBRManifestation.FRBRthis.set('value', uri.expression_uri())
+            self._get('FRBRManifestation.FRBRuri', ident).set('value', uri.expression_uri(False))
+            self._get('FRBRManifestation.FRBRthis', ident).set('value', uri.expression_uri())
 
     @property
     def year(self):
         """ The act year, derived from :data:`frbr_uri`. Read-only. """
-        return self.frbr_uri.date.split("-", 1)[0]
+        return self._frozen_frbr_uri().date.split("-", 1)[0]
 
     @property
     def number(self):
         """ The act number, derived from :data:`frbr_uri`. Read-only. """
-        return self.frbr_uri.number
+        return self._frozen_frbr_uri().number
 
     @property
     def nature(self):
         """ The nature of the document, such as an act, derived from :data:`frbr_uri`. Read-only. """
-        return self.frbr_uri.doctype
+        return self._frozen_frbr_uri().doctype
+
+    def _frozen_frbr_uri(self):
+        """ The work URI as a shared :class:`cobalt.uri.FrozenFrbrUri`, for read-only use. """
+        uri = self._get('meta.identification.FRBRWork.FRBRuri').get('value')
+        if uri:
+            return FrbrUri.parse(uri, frozen=True)
+        else:
+            return FrbrUri.empty()
 
     @property
     def body_xml(self):
@@ -218,25 +468,30 @@ class Act(Base):
 
     @body_xml.setter
     def body_xml(self, xml):
-        new_body = objectify.fromstring(xml or EMPTY_BODY)
+        if xml:
+            new_body = etree.fromstring(xml, get_parser(lean=self.lean))
+        else:
+            new_body = deepcopy(EMPTY_BODY_ETREE if self.lean else EMPTY_BODY_TREE)
         new_body.tag = 'body'
         self.body.getparent().replace(self.body, new_body)
         self.body = new_body
+        self.clear_caches()
 
     @property
     def amendments(self):
+        """ A list of :class:`AmendmentEvent` instances describing the amendments to this
+        document, sorted by date. """
+        refs = self._passive_refs()
         amendments = []
 
-        for e in self.meta.iterfind('.//{*}lifecycle/{*}eventRef[@type="amendment"]'):
-            date = arrow.get(e.get('date')).date()
-            event = AmendmentEvent(date=date)
+        for e in self._lifecycle_events('amendment'):
+            event = AmendmentEvent(date=parse_date(e.get('date')))
             amendments.append(event)
 
-            id = e.get('source')[1:]
-            source = self.meta.findall('.//{*}references/{*}passiveRef[@id="%s"]' % id)
-            if source:
-                event.amending_title = source[0].get('showAs')
-                event.amending_uri = source[0].get('href')
+            source = refs.get(e.get('source')[1:])
+            if source is not None:
+                event.amending_title = source.get('showAs')
+                event.amending_uri = source.get('href')
 
         amendments.sort(key=lambda a: a.date)
         return amendments
@@ -244,89 +499,88 @@ class Act(Base):
     @amendments.setter
     def amendments(self, value):
         # delete existing entries
-        for e in self.meta.iterfind('.//{*}lifecycle/{*}eventRef[@type="amendment"]'):
-            # delete the passive ref elements
-            id = e.get('source')[1:]
-            for node in self.meta.iterfind('.//{*}references/{*}passiveRef[@id="%s"]' % id):
-                node.getparent().remove(node)
-
-            # delete the event
-            e.getparent().remove(e)
-
-        if not value:
-            # no amendments
+        self._remove_events(self._lifecycle_events('amendment'))
+        self.act.set('contains', 'originalVersion')
+        self.add_amendments(value)
+
+    def add_amendments(self, events):
+        """ Add the :class:`AmendmentEvent` instances in *events* to this document,
+        leaving existing amendments in place. """
+        if not events:
+            return
+
+        self.act.set('contains', 'singleVersion')
+        lifecycle = self._ensure_lifecycle()
+        references = self._ensure('meta.references', after=lifecycle)
+        refs = self._passive_refs()
+
+        i = 0
+        for event in events:
+            # find an unused reference id
+            while 'amendment-%s-source' % i in refs:
+                i += 1
+
+            date = datestring(event.date)
+            self._add_event(lifecycle, references, 'amendment', 'amendment-' + date, date,
+                            'amendment-%s-source' % i, event.amending_uri, event.amending_title)
+
+    def remove_amendments(self, events):
+        """ Remove amendments from this document. An amendment is removed if its date
+        matches the date of an :class:`AmendmentEvent` in *events*, and the
+        ``amending_uri`` also matches, if it is set. """
+        # date -> set of uris, or None to match any uri
+        targets = {}
+        for event in events:
+            date = datestring(event.date)
+            if event.amending_uri is None:
+                targets[date] = None
+            elif targets.get(date, True) is not None:
+                targets.setdefault(date, set()).add(event.amending_uri)
+
+        refs = self._passive_refs()
+        remove = []
+        remaining = 0
+
+        for e in self._lifecycle_events('amendment'):
+            date = e.get('date')
+            if date in targets:
+                source = refs.get(e.get('source')[1:])
+                uris = targets[date]
+                if uris is None or (source is not None and source.get('href') in uris):
+                    remove.append(e)
+                    continue
+            remaining += 1
+
+        self._remove_events(remove)
+        if not remaining:
             self.act.set('contains', 'originalVersion')
-        else:
-            self.act.set('contains', 'singleVersion')
-            lifecycle = self._ensure_lifecycle()
-            references = self._ensure('meta.references', after=lifecycle)
-
-            for i, event in enumerate(value):
-                date = datestring(event.date)
-                ref = 'amendment-%s-source' % i
-
-                # create the lifecycle element
-                node = self._make('eventRef')
-                node.set('id', 'amendment-' + date)
-                node.set('date', date)
-                node.set('type', 'amendment')
-                node.set('source', '#' + ref)
-                lifecycle.append(node)
-
-                # create the passive ref
-                node = self._make('passiveRef')
-                node.set('id', ref)
-                node.set('href', event.amending_uri)
-                node.set('showAs', event.amending_title)
-                references.append(node)
 
     @property
     def repeal(self):
-        e = self.meta.find('.//{*}lifecycle/{*}eventRef[@type="repeal"]')
-        if e is not None:
-            date = arrow.get(e.get('date')).date()
-            event = RepealEvent(date=date)
-
-            id = e.get('source')[1:]
-            source = self.meta.findall('.//{*}references/{*}passiveRef[@id="%s"]' % id)
-            if source:
-                event.repealing_title = source[0].get('showAs')
-                event.repealing_uri = source[0].get('href')
+        """ A :class:`RepealEvent` describing the repeal of this document, or None. """
+        events = self._lifecycle_events('repeal')
+        if events:
+            e = events[0]
+            event = RepealEvent(date=parse_date(e.get('date')))
+
+            source = self._passive_refs().get(e.get('source')[1:])
+            if source is not None:
+                event.repealing_title = source.get('showAs')
+                event.repealing_uri = source.get('href')
             return event
 
     @repeal.setter
     def repeal(self, value):
         # delete existing entries
-        for e in self.meta.iterfind('.//{*}lifecycle/{*}eventRef[@type="repeal"]'):
-            # delete the passive ref elements
-            id = e.get('source')[1:]
-            for node in self.meta.iterfind('.//{*}references/{*}passiveRef[@id="%s"]' % id):
-                node.getparent().remove(node)
-
-            # delete the event
-            e.getparent().remove(e)
+        self._remove_events(self._lifecycle_events('repeal'))
 
         if value:
             lifecycle = self._ensure_lifecycle()
             references = self._ensure('meta.references', after=lifecycle)
 
             date = datestring(value.date)
-            ref = 'repeal-source'
-
-            # create the lifecycle element
-            node = self._make('eventRef')
-            node.set('id', 'repeal-' + date)
-            node.set('date', date)
-            node.set('type', 'repeal')
-            node.set('source', '#' + ref)
-            lifecycle.append(node)
-
-            # create the passive ref
-            node = self._make('passiveRef')
-            node.set('id', ref)
-            node.set('href', value.repealing_uri)
-            node.set('showAs', value.repealing_title)
-            references.append(node)
+            self._add_event(lifecycle, references, 'repeal', 'repeal-' + date, date,
+                            'repeal-source', value.repealing_uri, value.repealing_title)
 
     def components(self):
         """ Get an `OrderedDict` of component name to :class:`lxml.objectify.ObjectifiedElement`
@@ -336,12 +590,70 @@ class Act(Base):
         components['main'] = self.act
 
         # components/schedules
-        for doc in self.root.iterfind('./{*}components/{*}component/{*}doc'):
-            name = doc.meta.identification.FRBRWork.FRBRthis.get('value').split('/')[-1]
+        for doc in self._xpaths.components(self.root):
+            name = self._xpaths.component_name(doc)[0].split('/')[-1]
             components[name] = doc
 
         return components
 
+    def write(self, fileobj, pretty=False, components=None, compress=False):
+        """ Write the XML of this document to ``fileobj``, which can be a filename or a
+        file-like object with a ``write()`` method, such as an open file. To write to a socket,
+        use a file wrapping it, such as ``sock.makefile('wb')``.
+
+        The XML is written as it is serialized, rather than being built up in memory first,
+        which makes this better suited to exporting large documents than :meth:`to_xml`.
+
+        :param fileobj: filename or file-like object to write to, not a raw socket
+        :param pretty: pretty-print the XML?
+        :param components: names of the components to write, such as ``['main', 'schedule1']``,
+                           or None for all of them. See :meth:`components`. If ``main`` isn't
+                           included, the ``act`` element is left out.
+        :param compress: gzip the output?
+        """
+        close = isinstance(fileobj, basestring)
+        if close:
+            fileobj = open(fileobj, 'wb')
+
+        try:
+            if compress:
+                with gzip.GzipFile(fileobj=fileobj, mode='wb') as f:
+                    self._write(f, pretty, components)
+            else:
+                self._write(fileobj, pretty, components)
+        finally:
+            if close:
+                fileobj.close()
+
+    def _write(self, fileobj, pretty, components):
+        with etree.xmlfile(fileobj, encoding='utf-8') as xf:
+            xf.write_declaration()
+
+            if components is None:
+                xf.write(self.root, pretty_print=pretty)
+                return
+
+            components = set(components)
+            # the component elements of the wanted schedules
+            wanted = set(doc.getparent() for name, doc in self.components().iteritems()
+                         if name != 'main' and name in components)
+
+            with xf.element(self.root.tag, self.root.attrib, nsmap=self.root.nsmap):
+                for child in self.root.iterchildren():
+                    if child is self.act:
+                        if 'main' in components:
+                            xf.write(child, pretty_print=pretty)
+
+                    elif child.tag == '{%s}components' % self.namespace:
+                        if wanted:
+                            with xf.element(child.tag, child.attrib):
+                                for component in child.iterchildren():
+                                    if component in wanted:
+                                        xf.write(component, pretty_print=pretty)
+
+                    else:
+                        xf.write(child, pretty_print=pretty)
+
     def table_of_contents(self, builder=None):
         """ Get the table of contents of this document as a list of :class:`cobalt.toc.TOCElement` instances. """
         builder = builder or TOCBuilder()
@@ -351,17 +663,36 @@ class Act(Base):
         """ Get the named subcomponent in this document, such as `chapter/2` or 'section/13A'.
         :class:`lxml.objectify.ObjectifiedElement` or `None`.
         """
-        def search_toc(items):
-            for item in items:
-                if item.component == component and item.subcomponent == subcomponent:
-                    return item.element
+        if self._subcomponents is None:
+            self._subcomponents = TOCBuilder().subcomponent_index(self)
+        return self._subcomponents.get((component, subcomponent))
 
-                if item.children:
-                    found = search_toc(item.children)
-                    if found:
-                        return found
-
-        return search_toc(self.table_of_contents())
+    def get_element_by_id(self, id):
+        """ Get the element in this document with the given `id` attribute.
+        :class:`lxml.objectify.ObjectifiedElement` or `None`.
+        """
+        if self._ids is None:
+            self._ids = {}
+            for e in self._xpaths.ids(self.root):
+                self._ids.setdefault(e.get('id'), e)
+        return self._ids.get(id)
+
+    def clear_caches(self):
+        """ Forget any cached information about the structure of the document.
+
+        Cobalt caches references to frequently used elements, such as those in
+        ``meta.identification``, and indexes of subcomponents and ids. The caches are cleared automatically when the document
+        is changed through this class, but you must call this method if you add, move or remove
+        elements directly.
+        """
+        # dotted path -> element (or None), see _get
+        self._nodes = {}
+        # id -> passiveRef element, see _passive_refs
+        self._references = None
+        # (component, subcomponent) -> element, see get_subcomponent
+        self._subcomponents = None
+        # id -> element, see get_element_by_id
+        self._ids = None
 
     def _ensure(self, name, after):
         """ Hack help to get an element if it exists, or create it if it doesn't.
@@ -372,14 +703,14 @@ class Act(Base):
             # TODO: what if nodes in the path don't exist?
             node = self._make(name.split('.')[-1])
             after.addnext(node)
+            self._nodes[name] = node
 
         return node
 
     def _ensure_lifecycle(self):
-        try:
-            after = self.meta.publication
-        except AttributeError:
-            after = self.meta.identification
+        after = self._get('meta.publication')
+        if after is None:
+            after = self._get('meta.identification')
         node = self._ensure('meta.lifecycle', after=after)
 
         if not node.get('source'):
@@ -391,7 +722,7 @@ class Act(Base):
     def _ensure_reference(self, elem, name, id, href):
         references = self._ensure('meta.references', after=self._ensure_lifecycle())
 
-        ref = references.find('./{*}%s[@id="%s"]' % (elem, id))
+        ref = self._xpaths.first(self._xpaths.reference, references, tag=elem, id=id)
         if ref is None:
             ref = self._make(elem)
             ref.set('id', id)
@@ -400,19 +731,177 @@ class Act(Base):
             references.insert(0, ref)
         return ref
 
+    def _lifecycle_events(self, type_):
+        """ The lifecycle eventRef elements with the given type. """
+        return self._xpaths.events(self.meta, type=type_)
+
+    def _passive_refs(self):
+        """ A dict from id to passiveRef element in the references block, which is built
+        once and then kept up to date by :meth:`_add_event` and :meth:`_remove_events`. """
+        if self._references is None:
+            self._references = {}
+            references = self._get('meta.references')
+            if references is not None:
+                for ref in self._xpaths.passive_refs(references):
+                    self._references[ref.get('id')] = ref
+        return self._references
+
+    def _add_event(self, lifecycle, references, type_, id, date, ref, href, title):
+        """ Add a lifecycle eventRef and its passiveRef source. """
+        node = self._make('eventRef')
+        node.set('id', id)
+        node.set('date', date)
+        node.set('type', type_)
+        node.set('source', '#' + ref)
+        lifecycle.append(node)
+
+        node = self._make('passiveRef')
+        node.set('id', ref)
+        node.set('href', href)
+        node.set('showAs', title)
+        references.append(node)
+        self._passive_refs()[ref] = node
+
+    def _remove_events(self, events):
+        """ Remove lifecycle eventRef elements and their passiveRef sources. """
+        refs = self._passive_refs()
+        for e in events:
+            node = refs.pop(e.get('source')[1:], None)
+            if node is not None:
+                node.getparent().remove(node)
+            e.getparent().remove(e)
+
     def _make(self, elem):
+        if self.lean:
+            return self.root.makeelement('{%s}%s' % (self.namespace, elem), nsmap=self.root.nsmap)
         return getattr(self._maker, elem)()
 
     def _get(self, name, root=None):
-        parts = name.split('.')
-        node = root or self
-
-        for p in parts:
+        """ Get the element at the dotted path *name* from *root*, or None if it doesn't exist.
+        Paths from *self* start with one of its attributes, such as ``meta``, and lookups from *self*
+        are cached, see :meth:`clear_caches`. """
+        if root is None:
             try:
-                node = getattr(node, p)
-            except AttributeError:
-                return None
-        return node
+                return self._nodes[name]
+            except KeyError:
+                pass
+
+            first, _, rest = name.partition('.')
+            node = getattr(self, first)
+            if rest and node is not None:
+                node = self._xpaths.first(self._xpaths.path(rest), node)
+            self._nodes[name] = node
+            return node
+
+        return self._xpaths.first(self._xpaths.path(name), root)
+
+
+class ActMeta(Act):
+    """ A metadata-only view of an act document, as returned by :meth:`Act.load_meta`.
+
+    All the metadata properties of :class:`Act` are available, but the body of the document
+    is not loaded and so ``body`` is None. Use :meth:`load` to get the full :class:`Act`.
+    """
+
+    # content elements that are discarded as soon as they have been parsed
+    discarded_elements = ['coverPage', 'preface', 'preamble', 'body', 'mainBody', 'conclusions',
+                          'chapter', 'part', 'section']
+
+    # the start of the top-level components element, which follows the act
+    components_re = re.compile(br'<components[\s>]')
+
+    def __init__(self, source, components=True, lean=False):
+        self._document = source
+        self._init_root(self._parse_meta(source, components, lean))
+
+    def _init_root(self, root):
+        Base._init_root(self, root)
+        self.act = self._xpaths.first(self._xpaths.act, self.root)
+        self.meta = self._get('meta', root=self.act)
+        self.body = None
+        self.clear_caches()
+
+    def load(self):
+        """ Load the full document as an :class:`Act`. """
+        return Act(self._read(self._document), lean=self.lean)
+
+    def _parse_meta(self, source, components, lean):
+        if not components:
+            if self._is_xml(source):
+                source = BytesIO(source.encode('utf-8') if isinstance(source, unicode) else source)
+            return self._iterparse(source, False, lean)
+
+        xml = self._read(source)
+        if isinstance(xml, unicode):
+            xml = xml.encode('utf-8')
+
+        # Rather than parsing the body only to throw it away, parse the start of the document up to
+        # the meta element of the act, and then just the top-level components element, which follows
+        # the act. Documents that don't use the default namespace for the act are parsed in full.
+        act_end = xml.rfind(b'</act>')
+        if act_end < 0:
+            return self._iterparse(BytesIO(xml), True, lean)
+
+        root = self._iterparse(BytesIO(xml), False, lean)
+        match = self.components_re.search(xml, act_end)
+        if match:
+            end = xml.rfind(b'</components>') + len(b'</components>')
+            # the components need the encoding and namespaces of the document
+            decl = xml[:xml.find(b'?>') + 2] if xml.startswith(b'<?xml') else b''
+            nsdecls = ' '.join(('xmlns="%s"' % uri) if prefix is None else ('xmlns:%s="%s"' % (prefix, uri))
+                               for prefix, uri in root.nsmap.iteritems())
+            fragment = b''.join([decl, b'<akomaNtoso ', nsdecls.encode('utf-8'), b'>',
+                                 xml[match.start():end], b'</akomaNtoso>'])
+            root.extend(list(self._iterparse(BytesIO(fragment), True, lean).iterchildren()))
+
+        return root
+
+    def _iterparse(self, source, components, lean):
+        # We only get events for meta and for large container elements, which
+        # we discard as soon as we're done with them. This keeps memory usage down
+        # without calling into python for every element in the document.
+        tags = ['{*}meta'] + ['{*}' + t for t in self.discarded_elements]
+        context = etree.iterparse(source, events=('end',), tag=tags, remove_blank_text=True)
+        if not lean:
+            context.set_element_class_lookup(objectify.ObjectifyElementClassLookup())
+
+        root = None
+        for event, elem in context:
+            parent = elem.getparent()
+            if root is None:
+                root = elem.getroottree().getroot()
+                ns = '{%s}' % root.nsmap[None]
+                meta = ns + 'meta'
+                containers = set([ns + 'act', ns + 'doc'])
+
+            if elem.tag == meta:
+                if not components and parent.tag == ns + 'act':
+                    # we have everything we need, discard anything the
+                    # parser has already read past this point
+                    for node in list(elem.itersiblings()) + list(parent.itersiblings()):
+                        node.getparent().remove(node)
+                    break
+
+            else:
+                # throw away this element's children, we don't need them
+                elem.clear()
+                if parent.tag in containers:
+                    parent.remove(elem)
+
+        del context
+        return root
+
+    @classmethod
+    def _is_xml(cls, source):
+        # a filename will never contain a '<'
+        return isinstance(source, basestring) and '<' in source[:200]
+
+    @classmethod
+    def _read(cls, source):
+        if cls._is_xml(source):
+            return source
+        with open(source, 'rb') as f:
+            return f.read()
 
 
 class AmendmentEvent(object):
@@ -492,3 +981,11 @@ EMPTY_BODY = """
   </section>
 </body>
 """
+
+# Pre-parsed versions of the above, which are copied rather than parsed from scratch
+# each time a new empty document or body is needed.
+EMPTY_DOCUMENT_TREE = objectify.fromstring(EMPTY_DOCUMENT)
+EMPTY_BODY_TREE = objectify.fromstring(EMPTY_BODY)
+# ... and for lean documents
+EMPTY_DOCUMENT_ETREE = etree.fromstring(EMPTY_DOCUMENT, get_parser(lean=True))
+EMPTY_BODY_ETREE = etree.fromstring(EMPTY_BODY, get_parser(lean=True))
@@ -0,0 +1,189 @@
+import os
+import hashlib
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def content_hash(*parts):
+    """ A hex digest of the strings in ``parts``, for use as a cache key. """
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, unicode):
+            part = part.encode('utf-8')
+        # include the length so that parts can't run into each other
+        digest.update('%d:' % len(part))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class Cache(object):
+    """ A cache of strings, such as rendered HTML, keyed by content hashes (see :func:`content_hash`).
+
+    The most recently used entries are kept in memory, up to a total of ``max_bytes``. If ``path``
+    is given, entries are also stored on disk so that they survive restarts and can be shared
+    between processes. ``path`` is either a directory, or a file ending in ``.sqlite`` or ``.db``
+    for an SQLite database.
+
+    Entries on disk are never evicted, use :meth:`clear` to remove them. Caches can be used
+    by many threads at once.
+
+    :param max_bytes: maximum size of the entries kept in memory
+    :param path: directory or SQLite filename for the on-disk tier, or None
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, path=None):
+        self.max_bytes = max_bytes
+        self.store = None
+        if path:
+            if path.endswith(('.sqlite', '.db')):
+                self.store = SqliteStore(path)
+            else:
+                self.store = DirectoryStore(path)
+
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.size = 0
+        self.reset_stats()
+
+    def get(self, key):
+        """ Get the entry for ``key``, or None. """
+        with self.lock:
+            value = self.entries.pop(key, None)
+            if value is not None:
+                # most recently used entries are at the end
+                self.entries[key] = value
+                self.memory_hits += 1
+                return value
+
+        if self.store:
+            value = self.store.get(key)
+            if value is not None:
+                with self.lock:
+                    self.disk_hits += 1
+                self._remember(key, value)
+                return value
+
+        with self.lock:
+            self.misses += 1
+
+    def set(self, key, value):
+        """ Store ``value`` (a string) for ``key``. """
+        self._remember(key, value)
+        if self.store:
+            self.store.set(key, value)
+
+    def clear(self):
+        """ Remove all entries, including those on disk. """
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+        if self.store:
+            self.store.clear()
+
+    def reset_stats(self):
+        self.memory_hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """ Statistics about this cache, as a dict with these entries:
+
+        - ``hits``: number of lookups that found an entry, ``memory_hits + disk_hits``
+        - ``memory_hits``, ``disk_hits``: number of lookups answered by each tier
+        - ``misses``: number of lookups that didn't find an entry
+        - ``evictions``: number of entries removed from memory to make space
+        - ``entries``, ``bytes``: number and total size of the entries in memory
+        """
+        with self.lock:
+            return {
+                'hits': self.memory_hits + self.disk_hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.size,
+            }
+
+    def _remember(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+
+            while self.entries and self.size + len(value) > self.max_bytes:
+                self.size -= len(self.entries.popitem(last=False)[1])
+                self.evictions += 1
+
+            self.entries[key] = value
+            self.size += len(value)
+
+
+class DirectoryStore(object):
+    """ Cache entries stored as files in a directory. """
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def get(self, key):
+        try:
+            with open(self._filename(key), 'rb') as f:
+                return f.read()
+        except IOError:
+            return None
+
+    def set(self, key, value):
+        fname = self._filename(key)
+        dirname = os.path.dirname(fname)
+        if not os.path.isdir(dirname):
+            try:
+                os.makedirs(dirname)
+            except OSError:
+                # another process got there first
+                pass
+
+        # write to a temporary file and then rename it, so that readers never see partial entries
+        fd, tmp = tempfile.mkstemp(dir=dirname)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(value)
+        os.rename(tmp, fname)
+
+    def clear(self):
+        for dirpath, dirnames, filenames in os.walk(self.path):
+            for fname in filenames:
+                os.unlink(os.path.join(dirpath, fname))
+
+    def _filename(self, key):
+        # eg. ab/abcdef...
+        return os.path.join(self.path, key[:2], key)
+
+
+class SqliteStore(object):
+    """ Cache entries stored in an SQLite database. """
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB)')
+        self.db.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute('SELECT value FROM cache WHERE key = ?', (key,)).fetchone()
+        if row:
+            return str(row[0])
+
+    def set(self, key, value):
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)', (key, sqlite3.Binary(value)))
+            self.db.commit()
+
+    def clear(self):
+        with self.lock:
+            self.db.execute('DELETE FROM cache')
+            self.db.commit()
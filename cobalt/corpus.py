@@ -0,0 +1,131 @@
+import os
+import multiprocessing
+
+from .act import Act, datestring
+
+
+def scan(paths, workers=None, chunksize=20, ordered=True, extensions=('.xml',)):
+    """ Extract the metadata from a collection of Akoma Ntoso documents, using a pool
+    of worker processes.
+
+    Each document is loaded with :meth:`cobalt.act.Act.load_meta` and its metadata is
+    returned as a plain dict (see :func:`metadata`), which is cheap to send between
+    processes. Documents that can't be loaded don't stop the scan, instead their record
+    has an ``error`` entry describing the problem.
+
+    Example::
+
+        >>> for record in scan(['/data/akn'], workers=4):
+        ...     if not record['error']:
+        ...         print record['frbr_uri'], record['title']
+
+    :param paths: a filename or directory name, or a list of them. Directories are
+                  searched recursively for files ending in one of ``extensions``.
+    :param workers: number of worker processes, defaults to the number of CPUs. If this is 0,
+                    the documents are scanned in this process.
+    :param chunksize: number of documents sent to a worker at a time
+    :param ordered: if True, records are yielded in the same order as the files, otherwise
+                    they are yielded as soon as they are ready
+    :param extensions: file extensions to look for in directories
+    :return: a generator of metadata dicts
+    """
+    filenames = find_files(paths, extensions)
+
+    if workers == 0:
+        for fname in filenames:
+            yield scan_file(fname)
+        return
+
+    pool = multiprocessing.Pool(workers)
+    try:
+        if ordered:
+            results = pool.imap(scan_file, filenames, chunksize)
+        else:
+            results = pool.imap_unordered(scan_file, filenames, chunksize)
+
+        for record in results:
+            yield record
+
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def find_files(paths, extensions=('.xml',)):
+    """ Generate the filenames in ``paths``, recursively searching directories for
+    files ending in one of ``extensions``. Files are yielded in a stable order. """
+    if isinstance(paths, basestring):
+        paths = [paths]
+
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for fname in sorted(filenames):
+                    if fname.endswith(tuple(extensions)):
+                        yield os.path.join(dirpath, fname)
+        else:
+            yield path
+
+
+def scan_file(fname):
+    """ Get the metadata for the document in ``fname`` as a dict. Errors are caught
+    and described in the ``error`` entry of the dict.
+
+    The document is loaded with :meth:`cobalt.act.Act.load_meta`, which doesn't parse the body,
+    so this is much quicker than loading the whole document. """
+    try:
+        info = metadata(Act.load_meta(fname, lean=True))
+        info['error'] = None
+    except Exception as e:
+        info = {'error': '%s: %s' % (e.__class__.__name__, e)}
+
+    info['path'] = fname
+    return info
+
+
+def metadata(act):
+    """ Get the metadata for an :class:`cobalt.act.Act` (or :class:`cobalt.act.ActMeta`) as
+    a plain dict, with the following entries:
+
+    - ``frbr_uri``: work URI string
+    - ``expression_uri``: expression URI string
+    - ``title``, ``language``
+    - ``work_date``, ``expression_date``, ``manifestation_date``: :class:`datetime.date`
+    - ``publication_name``, ``publication_number``, ``publication_date``: may be None
+    - ``amendments``: list of dicts with ``date``, ``amending_title`` and ``amending_uri``
+    - ``repeal``: dict with ``date``, ``repealing_title`` and ``repealing_uri``, or None
+    - ``components``: list of component names, such as ``main`` and ``schedule1``
+    """
+    uri = act.frbr_uri
+    uri.language = act.language
+    uri.expression_date = '@' + datestring(act.expression_date)
+
+    repeal = act.repeal
+    if repeal:
+        repeal = {
+            'date': repeal.date,
+            'repealing_title': repeal.repealing_title,
+            'repealing_uri': repeal.repealing_uri,
+        }
+
+    return {
+        'frbr_uri': uri.work_uri(),
+        'expression_uri': uri.expression_uri(),
+        'title': act.title,
+        'language': act.language,
+        'work_date': act.work_date,
+        'expression_date': act.expression_date,
+        'manifestation_date': act.manifestation_date,
+        'publication_name': act.publication_name,
+        'publication_number': act.publication_number,
+        'publication_date': act.publication_date,
+        'amendments': [{
+            'date': a.date,
+            'amending_title': a.amending_title,
+            'amending_uri': a.amending_uri,
+        } for a in act.amendments],
+        'repeal': repeal,
+        'components': act.components().keys(),
+    }
@@ -0,0 +1,134 @@
+""" Hooks for measuring how long cobalt's expensive operations take.
+
+Register a hook with :func:`add_hook` and it is called with an :class:`Event` after each of
+these operations:
+
+- ``act.parse``: parsing a document in :class:`cobalt.act.Act`
+- ``toc.build``: building a table of contents with :meth:`cobalt.toc.TOCBuilder.table_of_contents`
+- ``uri.parse``: :meth:`cobalt.uri.FrbrUri.parse`
+- ``render``: transforming a document with :meth:`cobalt.render.HTMLRenderer.render`
+
+For example, to log slow renders::
+
+    >>> def log_slow(event):
+    ...     if event.name == 'render' and event.duration > 1:
+    ...         log.warning("Slow render: %.2fs for %d elements", event.duration, event.elements)
+    >>> add_hook(log_slow)
+
+:class:`Counters` is a hook that keeps cumulative counts and histograms of the events. A shared
+instance is available as :data:`counters`, register it with ``add_hook(counters)``.
+
+When no hooks are registered, the only cost to each operation is checking the :data:`hooks` list.
+"""
+import threading
+from timeit import default_timer as clock
+
+# The registered hooks. Operations check this before doing any timing.
+hooks = []
+
+
+class Event(object):
+    """ Describes an operation that has completed.
+
+    :ivar name: name of the operation, such as ``render``
+    :ivar duration: how long the operation took, in seconds
+    :ivar size: size of the document (or URI) parsed, or of the HTML produced, if known, otherwise None
+    :ivar node: the XML tree or element involved, may be None
+    """
+    __slots__ = ('name', 'duration', 'size', 'node', '_elements')
+
+    def __init__(self, name, duration, size=None, node=None):
+        self.name = name
+        self.duration = duration
+        self.size = size
+        self.node = node
+        self._elements = None
+
+    @property
+    def elements(self):
+        """ Number of elements in :attr:`node`, or None. This is only counted if it is used. """
+        if self._elements is None and self.node is not None:
+            node = self.node
+            if hasattr(node, 'getroot'):
+                node = node.getroot()
+            self._elements = sum(1 for e in node.iter())
+        return self._elements
+
+
+def add_hook(hook):
+    """ Register ``hook``, a function that is called with an :class:`Event` after each operation. """
+    if hook not in hooks:
+        hooks.append(hook)
+
+
+def remove_hook(hook):
+    """ Unregister a hook added with :func:`add_hook`. """
+    if hook in hooks:
+        hooks.remove(hook)
+
+
+def notify(name, start, size=None, node=None):
+    """ Tell the hooks that the operation ``name``, which started at ``clock()`` time ``start``,
+    has completed. """
+    event = Event(name, clock() - start, size, node)
+    for hook in list(hooks):
+        hook(event)
+
+
+class Counters(object):
+    """ A hook that keeps cumulative statistics for each operation, see :meth:`as_dict`. """
+
+    # upper bounds, in seconds, of the buckets of the duration histograms
+    buckets = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, 10.0, float('inf'))
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def __call__(self, event):
+        with self.lock:
+            stats = self.stats.get(event.name)
+            if stats is None:
+                stats = self.stats[event.name] = {
+                    'count': 0,
+                    'seconds': 0.0,
+                    'max_seconds': 0.0,
+                    'size': 0,
+                    'histogram': [0] * len(self.buckets),
+                }
+
+            stats['count'] += 1
+            stats['seconds'] += event.duration
+            stats['max_seconds'] = max(stats['max_seconds'], event.duration)
+            if event.size:
+                stats['size'] += event.size
+
+            for i, bound in enumerate(self.buckets):
+                if event.duration <= bound:
+                    stats['histogram'][i] += 1
+                    break
+
+    def reset(self):
+        """ Forget all the statistics. """
+        self.stats = {}
+
+    def as_dict(self):
+        """ The statistics as a dict from operation name to a dict with these entries:
+
+        - ``count``: number of operations
+        - ``seconds``, ``max_seconds``: total and longest duration
+        - ``size``: total of the event sizes, where known
+        - ``histogram``: a list of ``(upper bound, count)`` tuples with the number of operations
+          that took at most that many seconds, and more than the previous bound
+        """
+        with self.lock:
+            result = {}
+            for name, stats in self.stats.iteritems():
+                stats = dict(stats)
+                stats['histogram'] = zip(self.buckets, stats['histogram'])
+                result[name] = stats
+            return result
+
+
+#: A shared :class:`Counters` instance, which must be registered with :func:`add_hook` to be used.
+counters = Counters()
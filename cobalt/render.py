@@ -1,6 +1,74 @@
 import os
+import re
+import threading
+import time
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+from collections import OrderedDict
+from copy import deepcopy
+
 import lxml.etree as ET
 
+from . import instrument
+from .act import get_parser
+from .cache import Cache, content_hash
+
+
+# Compiled XSLT stylesheets, see compile_xslt. lxml's XSLT objects must not be shared
+# between threads, so each thread has its own cache.
+_local = threading.local()
+XSLT_CACHE_SIZE = 16
+
+# xslt_dir -> set of XSL filenames in the directory, see HTMLRenderer.find_xslt
+_xslt_dirs = {}
+
+# filename -> (mtime, hash of the stylesheet), see xslt_fingerprint
+_fingerprints = {}
+
+
+def compile_xslt(filename, reload=True):
+    """ Get a compiled :class:`lxml.etree.XSLT` for the stylesheet in ``filename``.
+
+    Compiled stylesheets are cached per thread, so this is only expensive the first time a
+    thread uses a stylesheet, or when the file has changed. Only the ``XSLT_CACHE_SIZE`` most
+    recently used stylesheets are kept.
+
+    :param reload: check whether the file has changed since it was compiled. If False, a
+                   stylesheet that this thread has already compiled is used without checking.
+    """
+    cache = getattr(_local, 'xslt', None)
+    if cache is None:
+        # filename -> (mtime, XSLT)
+        cache = _local.xslt = OrderedDict()
+
+    entry = cache.pop(filename, None)
+    if entry is None or (reload and entry[0] != os.path.getmtime(filename)):
+        entry = (os.path.getmtime(filename), ET.XSLT(ET.parse(filename)))
+        while len(cache) >= XSLT_CACHE_SIZE:
+            cache.popitem(last=False)
+
+    # most recently used entries are at the end
+    cache[filename] = entry
+    return entry[1]
+
+
+def xslt_fingerprint(filename):
+    """ A hash of the contents of the stylesheet in ``filename``, which changes when the stylesheet
+    changes. This is only recalculated when the file has been modified. """
+    mtime = os.path.getmtime(filename)
+    entry = _fingerprints.get(filename)
+    if entry is None or entry[0] != mtime:
+        with open(filename, 'rb') as f:
+            entry = _fingerprints[filename] = (mtime, content_hash(f.read()))
+    return entry[1]
+
+
+def clear_xslt_cache():
+    """ Forget compiled stylesheets (for this thread) and the contents of XSLT directories.
+    Use this if stylesheet files have been added or removed. """
+    _local.xslt = None
+    _xslt_dirs.clear()
+
 
 class HTMLRenderer(object):
     """
@@ -10,8 +78,17 @@ class HTMLRenderer(object):
     Akoma Ntoso elements into **div** or **span** HTML elements. The class
     attribute on each element is set to ``an-element`` where `element` is the
     Akoma Ntoso element name.  The **id** attribute is copied over directly.
+
+    Stylesheets are only compiled once per thread (see :func:`compile_xslt`), so creating
+    a renderer is cheap, and a renderer can be used by many threads. A compiled stylesheet
+    can also be set directly, with ``renderer.xslt = etree.XSLT(...)``.
     """
 
+    # check whether the stylesheet file has changed each time it's used, see compile_xslt
+    reload_xslt = False
+    # a stylesheet that has been set directly, see xslt
+    _xslt = None
+
     def __init__(self, act=None, uri=None, country=None, language=None, subtype=None, xslt_filename=None, xslt_dir=None):
         """
         Create a new, re-usable render. The renderer must be able to find an appropriate
@@ -26,15 +103,192 @@ class HTMLRenderer(object):
         :param xslt_filename: specify filename directly, all other params ignored
         """
         if xslt_filename is None:
-            xslt_filename = self.find_xslt(act, uri, country, language, xslt_dir)
+            xslt_filename = self.find_xslt(act=act, uri=uri, country=country, language=language,
+                                           subtype=subtype, xslt_dir=xslt_dir)
 
         if not xslt_filename:
             xslt_filename = os.path.join(os.path.dirname(__file__), 'xsl/act.xsl')
-        self.xslt = ET.XSLT(ET.parse(xslt_filename))
+        self.xslt_filename = xslt_filename
+        # compile it now, so that errors are reported early
+        compile_xslt(xslt_filename)
+
+    @property
+    def xslt(self):
+        """ The compiled stylesheet. Unless one has been set directly, this is the stylesheet
+        in :attr:`xslt_filename`, compiled for the current thread. """
+        if self._xslt is not None:
+            return self._xslt
+        return compile_xslt(self.xslt_filename, reload=self.reload_xslt)
+
+    @xslt.setter
+    def xslt(self, xslt):
+        # the same stylesheet is used by all threads, and xslt_filename is ignored
+        self._xslt = xslt
+
+    # Elements that render_iter splits up, so that some of their children are rendered and
+    # yielded separately. Other elements are rendered in one go.
+    stream_elements = set(['akomaNtoso', 'act', 'body', 'components', 'component', 'doc', 'mainBody'])
+    # Elements whose children are all rendered separately by render_iter, such as top-level
+    # chapters and parts. Other children of stream_elements are only rendered separately if
+    # they are also in stream_elements.
+    chunk_elements = set(['body', 'mainBody'])
+
+    _placeholder = 'cobalt-render-'
+    _placeholder_re = re.compile(r'<!--cobalt-render-(\d+)-->')
 
     def render(self, node):
         """ Render an XML Tree or Element object into an HTML string """
-        return ET.tostring(self.xslt(node))
+        start = instrument.clock() if instrument.hooks else None
+        html = ET.tostring(self.xslt(node))
+        if start is not None:
+            instrument.notify('render', start, size=len(html), node=node)
+        return html
+
+    def render_many(self, items, workers=None, ordered=True, processes=False, chunksize=1):
+        """ Render many acts into HTML using a pool of worker threads (or processes).
+
+        lxml releases the GIL while transforming, so worker threads can render in parallel.
+        Each thread compiles the stylesheet once and then re-uses it, see :func:`compile_xslt`.
+        With ``processes=True`` a pool of processes is used instead. The stylesheet is compiled
+        before the processes are started, so they inherit it. Acts are sent to the processes
+        as XML, so this is best suited to rendering files. Worker processes don't use the cache
+        of a :class:`CachedHTMLRenderer`.
+
+        Example::
+
+            >>> results = HTMLRenderer().render_many(filenames, workers=4)
+            >>> for fname, html in zip(filenames, results):
+            ...     save(fname, html)
+            >>> print "%.1f documents per second" % results.rate
+
+        :param items: a list of :class:`cobalt.act.Act` objects, XML Elements or Trees, or filenames
+        :param workers: number of worker threads or processes, defaults to the number of CPUs. If this
+                        is 0, the documents are rendered in this thread.
+        :param ordered: if True, the HTML strings are produced in the same order as ``items``, otherwise
+                        ``(index, html)`` tuples are produced as soon as each document is rendered
+        :param processes: use worker processes rather than threads
+        :param chunksize: number of documents sent to a worker at a time
+        :rtype: :class:`RenderResults`
+        """
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+
+        if workers == 0:
+            results = (self.render(_render_input(item)) for item in items)
+            if not ordered:
+                results = enumerate(results)
+            return RenderResults(results)
+
+        if processes:
+            if self._xslt is not None:
+                raise ValueError("A stylesheet that has been set directly can't be used by worker processes")
+            # compile the stylesheet before forking, so that the workers inherit it
+            compile_xslt(self.xslt_filename)
+            pool = multiprocessing.Pool(workers)
+            func = _render_process
+            items = [(self.xslt_filename, _picklable_input(item)) for item in items]
+        else:
+            pool = ThreadPool(workers)
+            func = self._render_thread
+
+        if ordered:
+            results = pool.imap(func, items, chunksize)
+        else:
+            results = pool.imap_unordered(_Indexed(func), enumerate(items), chunksize)
+        return RenderResults(results, pool)
+
+    def _render_thread(self, item):
+        return self.render(_render_input(item))
+
+    def render_subcomponent(self, act, component, subcomponent):
+        """ Render just one subcomponent of an act, such as ``section/13A`` or ``chapter/2``,
+        into an HTML string. This is the same as the HTML for that element in the output of
+        :meth:`render`, but only the element is transformed, so it is much quicker for large acts.
+
+        :param act: an :class:`cobalt.act.Act`
+        :param component: the component, such as ``main`` or ``schedule1``
+        :param subcomponent: the subcomponent, such as ``section/13A``, or None for the whole component
+        :return: the HTML string, or None if there is no such subcomponent
+
+        .. seealso:: :meth:`cobalt.act.Act.get_subcomponent`
+        """
+        if subcomponent is None:
+            element = act.components().get(component)
+        else:
+            element = act.get_subcomponent(component, subcomponent)
+
+        if element is not None:
+            # lxml transforms the subtree in place, without copying it
+            return self.render(element)
+
+    def render_iter(self, act):
+        """ Render an act into HTML in chunks, yielding each chunk as a string as soon as it is ready.
+        Joining the chunks gives the same HTML as ``render(act.root)``.
+
+        The document is transformed piece by piece, so the first chunk is ready quickly and
+        only one top-level part, chapter or section of the HTML is in memory at a time,
+        which suits chunked HTTP responses::
+
+            >>> for chunk in HTMLRenderer(act=act).render_iter(act):
+            ...     response.write(chunk)
+
+        Each piece is transformed on its own, so this assumes that the stylesheet's output for
+        an element depends only on that element and its descendants, as is the case for
+        the default stylesheet.
+
+        :param act: an :class:`cobalt.act.Act`, or an XML Element
+        """
+        node = getattr(act, 'root', act)
+        for chunk in self._render_iter(node):
+            if chunk:
+                yield chunk
+
+    def _render_iter(self, element):
+        name = ET.QName(element).localname
+        if name not in self.stream_elements:
+            yield self.render(element)
+            return
+        chunked = name in self.chunk_elements
+
+        # Transform a shallow copy of the element, with placeholders for its children,
+        # and then replace the output for each placeholder with the (streamed) output for
+        # the child.
+        shell = ET.Element(element.tag, element.attrib, nsmap=element.nsmap)
+        shell.text = element.text
+        children = list(element.iterchildren())
+        for i, child in enumerate(children):
+            if isinstance(child.tag, basestring) and (chunked or ET.QName(child).localname in self.stream_elements):
+                placeholder = ET.SubElement(shell, child.tag, child.attrib)
+                placeholder.set('id', '%s%d' % (self._placeholder, i))
+                placeholder.tail = child.tail
+            else:
+                # the stylesheet may use the contents of these, such as a:meta
+                shell.append(deepcopy(child))
+
+        result = self.xslt(shell)
+        found = set()
+        for output in result.xpath('//*[starts-with(@id, $prefix)]', prefix=self._placeholder):
+            i = output.get('id')[len(self._placeholder):]
+            parent = output.getparent()
+            if parent is None or i in found or not i.isdigit():
+                # the stylesheet isn't doing what we expect
+                yield self.render(element)
+                return
+
+            found.add(i)
+            marker = ET.Comment(self._placeholder + i)
+            marker.tail = output.tail
+            parent.replace(output, marker)
+
+        html = ET.tostring(result)
+        parts = self._placeholder_re.split(html)
+        # parts alternate between output and placeholder numbers
+        for j, part in enumerate(parts):
+            if j % 2:
+                for chunk in self._render_iter(children[int(part)]):
+                    yield chunk
+            else:
+                yield part
 
     def render_xml(self, xml):
         """ Render an XML string into an HTML string """
@@ -68,10 +322,138 @@ class HTMLRenderer(object):
         options.append('_'.join(["act", country]))
         options.append('act')
 
-        options = [os.path.join(xslt_dir, f + ".xsl") for f in options]
+        # only list the directory once, rather than checking for each file every time
+        files = _xslt_dirs.get(xslt_dir)
+        if files is None:
+            try:
+                files = set(f for f in os.listdir(xslt_dir) if f.endswith('.xsl'))
+            except OSError:
+                files = set()
+            _xslt_dirs[xslt_dir] = files
 
-        for fname in options:
-            if os.path.isfile(fname):
-                return fname
+        for option in options:
+            fname = option + ".xsl"
+            if fname in files:
+                return os.path.join(xslt_dir, fname)
 
         raise ValueError("Couldn't find XSLT file, not even the default, in %s" % xslt_dir)
+
+
+class CachedHTMLRenderer(HTMLRenderer):
+    """
+    An :class:`HTMLRenderer` that caches the HTML it renders, so that documents that haven't changed
+    are not transformed again.
+
+    Entries are keyed by a hash of the serialised XML of the document being rendered and of the
+    contents of the stylesheet (see :func:`xslt_fingerprint`), so changes to either are picked up
+    automatically. Use a :class:`cobalt.cache.Cache` with a ``path`` to keep the HTML across restarts::
+
+        >>> renderer = CachedHTMLRenderer(cache=Cache(path='/var/cache/cobalt/html.sqlite'))
+        >>> html = renderer.render(act.root)
+        >>> renderer.cache.stats()['hits']
+
+    Unlike :class:`HTMLRenderer`, the stylesheet file is checked for changes each time a document
+    is rendered. Documents are not cached if a stylesheet has been set directly.
+
+    This takes the same arguments as :class:`HTMLRenderer`, and also:
+
+    :param cache: the :class:`cobalt.cache.Cache` to use, a new in-memory cache is used if None
+    """
+
+    reload_xslt = True
+
+    def __init__(self, *args, **kwargs):
+        self.cache = kwargs.pop('cache', None) or Cache()
+        super(CachedHTMLRenderer, self).__init__(*args, **kwargs)
+
+    def render(self, node):
+        """ Render an XML Tree or Element object into an HTML string, using the cached
+        HTML if possible. """
+        if self._xslt is not None:
+            # the cache key doesn't cover it
+            return super(CachedHTMLRenderer, self).render(node)
+
+        key = self.cache_key(node)
+        html = self.cache.get(key)
+        if html is None:
+            html = super(CachedHTMLRenderer, self).render(node)
+            self.cache.set(key, html)
+        return html
+
+    def cache_key(self, node):
+        """ The cache key for rendering ``node``. """
+        # plain serialisation is much quicker than c14n, and is stable for a given tree
+        return content_hash(xslt_fingerprint(self.xslt_filename), ET.tostring(node))
+
+
+class RenderResults(object):
+    """ The results of :meth:`HTMLRenderer.render_many`. Iterate over this to get the results,
+    which are produced as the documents are rendered. Once all the results have been produced,
+    the worker pool is shut down and the throughput is available.
+
+    :ivar count: number of documents rendered so far
+    :ivar elapsed: seconds taken to render the documents so far
+    """
+
+    def __init__(self, results, pool=None):
+        self.results = results
+        self.pool = pool
+        self.count = 0
+        self.elapsed = 0.0
+        self.start = time.time()
+
+    def __iter__(self):
+        try:
+            for result in self.results:
+                self.count += 1
+                self.elapsed = time.time() - self.start
+                yield result
+
+            if self.pool:
+                self.pool.close()
+        finally:
+            if self.pool:
+                self.pool.terminate()
+                self.pool.join()
+                self.pool = None
+
+    @property
+    def rate(self):
+        """ Throughput in documents per second. """
+        if self.elapsed:
+            return self.count / self.elapsed
+        return 0.0
+
+
+class _Indexed(object):
+    """ Wraps a render function so that it takes and returns ``(index, value)`` tuples. """
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, item):
+        return item[0], self.func(item[1])
+
+
+def _render_input(item):
+    # something HTMLRenderer.render can transform
+    if isinstance(item, basestring):
+        # parse files as Act does, so that they render the same
+        return ET.parse(item, get_parser(lean=True))
+    if isinstance(item, tuple):
+        # from _picklable_input
+        return ET.fromstring(item[1])
+    return getattr(item, 'root', item)
+
+
+def _picklable_input(item):
+    if isinstance(item, basestring):
+        return item
+    if hasattr(item, 'getroot'):
+        item = item.getroot()
+    return ('xml', ET.tostring(getattr(item, 'root', item)))
+
+
+def _render_process(args):
+    xslt_filename, item = args
+    return ET.tostring(compile_xslt(xslt_filename, reload=False)(_render_input(item)))
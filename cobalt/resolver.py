@@ -0,0 +1,141 @@
+import operator
+from bisect import bisect_left, bisect_right
+
+from .uri import FrbrUri
+
+
+# the parts of a URI that identify the expressions of a work in a language
+_expression_key = operator.attrgetter('country', 'locality', 'doctype', 'subtype', 'actor',
+                                      'date', 'number', 'language')
+
+
+class Resolver(object):
+    """ An in-memory index of the expressions of works, which resolves FRBR URIs
+    to the value stored for the matching expression, such as a database id or filename.
+
+    Expressions are stored by their work, language and expression date. The expression date
+    in the URI being resolved determines which expression is chosen:
+
+    - ``@2015-01-01``: the expression at exactly that date
+    - ``:2015-01-01``: the latest expression on or before that date
+    - ``@`` or no date: the latest expression
+
+    Components, subcomponents and formats in URIs are ignored, so
+    ``/za-jhb/act/by-law/2003/public-health/eng:2015-01-01/main/part/A`` resolves to the
+    same expression as ``/za-jhb/act/by-law/2003/public-health/eng:2015-01-01``.
+
+    Example::
+
+        >>> resolver = Resolver()
+        >>> resolver.add('/za/act/1980/01/eng@2012-01-01', 1)
+        >>> resolver.add('/za/act/1980/01/eng@2014-06-01', 2)
+        >>> resolver.resolve('/za/act/1980/01/eng:2013-01-01')
+        1
+        >>> resolver.resolve('/za/act/1980/01/eng@')
+        2
+
+    Each work and language keeps a sorted list of expression dates, so resolving a URI is a
+    dict lookup and a binary search, and expressions can be added and removed at any time.
+    """
+
+    def __init__(self):
+        # expression key -> ([sorted expression dates], [values])
+        self._works = {}
+        self._count = 0
+
+    def add(self, uri, value):
+        """ Store ``value`` for the expression identified by ``uri``, which must have an
+        expression date such as ``@2015-01-01``. Replaces the existing value for that expression,
+        if there is one.
+
+        :param uri: expression URI, as a string or :class:`cobalt.uri.FrbrUri`
+        :param value: the value to return when resolving this expression
+        """
+        key, date = self._split(uri)
+        date = date[1:] if date else None
+        if not date:
+            raise ValueError("An expression date is required to add an expression: %s" % uri)
+
+        dates, values = self._works.setdefault(key, ([], []))
+        i = bisect_left(dates, date)
+        if i < len(dates) and dates[i] == date:
+            values[i] = value
+        else:
+            dates.insert(i, date)
+            values.insert(i, value)
+            self._count += 1
+
+    def remove(self, uri):
+        """ Remove the expression identified by ``uri``, which must have an expression date.
+        Raises a :class:`KeyError` if there is no such expression.
+
+        :param uri: expression URI, as a string or :class:`cobalt.uri.FrbrUri`
+        """
+        key, date = self._split(uri)
+        date = date[1:] if date else None
+        dates, values = self._works.get(key, ((), ()))
+        i = bisect_left(dates, date) if date else len(dates)
+        if i == len(dates) or dates[i] != date:
+            raise KeyError(uri)
+
+        del dates[i]
+        del values[i]
+        self._count -= 1
+        if not dates:
+            del self._works[key]
+
+    def resolve(self, uri, default=None):
+        """ Get the value of the expression that ``uri`` refers to, or ``default``
+        if there isn't one.
+
+        :param uri: work or expression URI, as a string or :class:`cobalt.uri.FrbrUri`
+        """
+        try:
+            key, date = self._split(uri)
+        except ValueError:
+            return default
+
+        expressions = self._works.get(key)
+        if expressions is None:
+            return default
+        dates, values = expressions
+
+        if not date or len(date) == 1:
+            # latest
+            return values[-1]
+
+        if date[0] == '@':
+            # exactly at date
+            date = date[1:]
+            i = bisect_left(dates, date)
+            if i < len(dates) and dates[i] == date:
+                return values[i]
+            return default
+
+        # latest on or before date
+        i = bisect_right(dates, date[1:])
+        if i:
+            return values[i - 1]
+        return default
+
+    def expressions(self, uri):
+        """ Get a list of ``(date, value)`` tuples for the expressions of the work and language
+        of ``uri``, ordered by date. The dates are strings such as ``2015-01-01``. """
+        dates, values = self._works.get(self._split(uri)[0], ((), ()))
+        return zip(dates, values)
+
+    def __len__(self):
+        """ The number of expressions. """
+        return self._count
+
+    def __contains__(self, uri):
+        return self.resolve(uri, _missing) is not _missing
+
+    def _split(self, uri):
+        # -> (key, expression date), where the date still has its @ or : prefix
+        if isinstance(uri, basestring):
+            uri = FrbrUri.parse(uri, frozen=True)
+        return _expression_key(uri), uri.expression_date
+
+
+_missing = object()
@@ -1,5 +1,13 @@
 import re
-from lxml.html import _collect_string_content
+from array import array
+from io import BytesIO
+from json.encoder import encode_basestring_ascii
+
+from lxml import etree
+
+from . import instrument
+from .cache import Cache, content_hash
+from .xpath import xpaths
 
 
 class TOCBuilder(object):
@@ -34,41 +42,108 @@ class TOCBuilder(object):
     component_id_re = re.compile('([^0-9]+)([0-9]+)')
 
     def table_of_contents(self, act):
-        """ Get the table of contents of ``act`` as a list of :class:`TOCElement` instances. """
-        interesting = set('{%s}%s' % (act.namespace, s) for s in self.toc_components)
-
-        def generate_toc(component, elements, parent=None):
-            items = []
-            for e in elements:
-                if e.tag in interesting:
-                    item = self.element(e, component, parent=parent)
-                    item.children = generate_toc(component, e.iterchildren(), parent=item)
-                    items.append(item)
-                else:
-                    items += generate_toc(component, e.iterchildren())
-            return items
+        """ Get the table of contents of ``act`` as a :class:`TableOfContents`, which is a list
+        of :class:`TOCElement` instances. """
+        start = instrument.clock() if instrument.hooks else None
+        toc = TableOfContents(self, act.namespace, act=act)
 
-        toc = []
         for component, element in act.components().iteritems():
             if component != "main":
                 # non-main components are items in their own right
                 item = self.element(element, component)
-                item.children = generate_toc(component, [element])
+                item.children = self.generate_toc(toc.interesting, component, [element])
                 toc += [item]
             else:
-                toc += generate_toc(component, [element])
+                toc.main = element
+                toc += self.generate_toc(toc.interesting, component, [element])
+
+        toc._remember(toc)
 
+        if start is not None:
+            instrument.notify('toc.build', start, node=act.root)
         return toc
 
+    def generate_toc(self, interesting, component, elements, parent=None):
+        """ Build a list of :class:`TOCElement` items for the tags in ``interesting`` found in
+        ``elements`` and their descendants. """
+        items = []
+        for e in elements:
+            if e.tag in interesting:
+                item = self.element(e, component, parent=parent)
+                item.children = self.generate_toc(interesting, component, e.iterchildren(), parent=item)
+                items.append(item)
+            else:
+                items += self.generate_toc(interesting, component, e.iterchildren())
+        return items
+
+    def subcomponent_index(self, act):
+        """ Get a dict from ``(component, subcomponent)`` tuples to the XML elements in ``act``
+        that have that subcomponent path, such as ``('main', 'chapter/2')``.
+
+        The paths are the same as those of the items in :meth:`table_of_contents`, but only the
+        tag, number and TOC parent of each element are looked at, and lxml finds the elements
+        of interest without calling into Python for the others. Headings and titles aren't
+        calculated. If a path is used more than once, the first element in the document wins.
+        """
+        interesting = ['{%s}%s' % (act.namespace, s) for s in self.toc_components]
+        num_tag = '{%s}num' % act.namespace
+        index = {}
+        # element -> (type, subcomponent), the context for elements directly inside it
+        parents = {}
+
+        for component, element in act.components().iteritems():
+            if component != "main":
+                index.setdefault((component, None), element)
+
+            # in document order, so parents come before their children
+            for e in element.iter(*interesting):
+                type_ = e.tag.rpartition('}')[2]
+                num = None
+                for child in e.iterchildren(num_tag):
+                    num = child.text
+                    break
+
+                parent = parents.get(e.getparent())
+                if parent:
+                    subcomponent = self.subcomponent(type_, num, *parent)
+                else:
+                    subcomponent = self.subcomponent(type_, num)
+
+                parents[e] = (type_, subcomponent)
+                index.setdefault((component, subcomponent), e)
+
+        return index
+
+    def subcomponent(self, type_, num, parent_type=None, parent_subcomponent=None):
+        """ The subcomponent path of an element of type ``type_`` with number ``num``,
+        such as ``chapter/2``, given the type and subcomponent path of its parent in the table
+        of contents. """
+        # if we have a chapter/part as a child of a chapter/part, we need to include
+        # the parent as context because they aren't unique, eg: part/1/chapter/2
+        if type_ in self.toc_non_unique_components and parent_type in self.toc_non_unique_components:
+            subcomponent = parent_subcomponent + "/"
+        else:
+            subcomponent = ""
+
+        # eg. 'preamble' or 'chapter/2'
+        subcomponent += type_
+
+        if num:
+            subcomponent += '/' + num.strip('.()')
+
+        return subcomponent
+
     def element(self, element, component, parent=None):
-        type_ = element.tag.split('}', 1)[-1]
+        # eg. '{http://www.akomantoso.org/2.0', 'section'
+        ns, _, type_ = element.tag.rpartition('}')
+        paths = xpaths(ns[1:])
         id_ = element.get('id')
 
         if type_ == 'doc':
             # component, get the title from the alias
-            heading = element.find('./{*}meta//{*}FRBRalias')
-            if heading is not None:
-                heading = heading.get('value')
+            heading = paths.alias(element)
+            if heading:
+                heading = heading[0]
             else:
                 # eg. schedule1 -> Schedule 1
                 m = self.component_id_re.match(component)
@@ -77,36 +152,264 @@ class TOCBuilder(object):
                 else:
                     heading = component.capitalize()
         else:
-            try:
-                heading = _collect_string_content(element.heading)
-            except AttributeError:
-                heading = None
+            heading = paths.heading(element)
+            heading = paths.text(heading[0]) if heading else None
 
-        try:
-            num = element.num
-        except AttributeError:
-            num = None
-
-        num = num.text if num else None
+        num = paths.num(element)
+        num = (num[0].text or None) if num else None
 
         if type_ == "doc":
             subcomponent = None
+        elif parent:
+            subcomponent = self.subcomponent(type_, num, parent.type, parent.subcomponent)
         else:
-            # if we have a chapter/part as a child of a chapter/part, we need to include
-            # the parent as context because they aren't unique, eg: part/1/chapter/2
-            if type_ in self.toc_non_unique_components and parent and parent.type in self.toc_non_unique_components:
-                subcomponent = parent.subcomponent + "/"
+            subcomponent = self.subcomponent(type_, num)
+
+        return TOCElement(element, component, type_, heading=heading, id_=id_,
+                          num=num, subcomponent=subcomponent, parent=parent)
+
+
+class TableOfContents(list):
+    """ The table of contents of a document, as built by :meth:`TOCBuilder.table_of_contents`.
+
+    This is a list of the top-level :class:`TOCElement` items, which also remembers the XML
+    element that produced each item. When an element in the document is replaced, call
+    :meth:`replaced` to update just the affected part of the table of contents, rather than
+    building it again from scratch. This also clears the caches of the act, so that
+    :meth:`cobalt.act.Act.get_subcomponent` and friends find the new element::
+
+        >>> toc = act.table_of_contents()
+        >>> old = act.get_subcomponent('main', 'section/2')
+        >>> old.getparent().replace(old, new)
+        >>> toc.replaced(old, new)
+
+    Use :meth:`write_json` or :meth:`to_json` to export the table of contents as JSON, and
+    :meth:`detach` for a compact copy that doesn't keep the XML document alive.
+    """
+
+    def __init__(self, builder, namespace, items=None, act=None):
+        super(TableOfContents, self).__init__(items or [])
+        self.builder = builder
+        # the act this is the table of contents of, if known
+        self.act = act
+        self.namespace = namespace
+        self.interesting = set('{%s}%s' % (namespace, s) for s in builder.toc_components)
+        # the element of the main component
+        self.main = None
+        # XML element -> TOCElement
+        self._items = {}
+
+    def replaced(self, old, new):
+        """ Update the table of contents after the XML element ``old`` has been replaced
+        by ``new`` in the document.
+
+        Only the items for ``old`` and ``new`` and their descendants are changed,
+        so the cost depends on the size of ``new`` rather than the whole document.
+        If a component is replaced, only its item is rebuilt. If ``new`` contains components
+        or the main component, the whole table of contents is rebuilt, which needs the act.
+        The caches of the act are cleared, see :meth:`cobalt.act.Act.clear_caches`.
+        """
+        if self.act is not None:
+            self.act.clear_caches()
+
+        # the nearest ancestor with a TOC item contains the items for this element
+        parent = None
+        for ancestor in new.iterancestors():
+            parent = self._items.get(ancestor)
+            if parent is not None:
+                break
+
+        if parent is None:
+            item = self._items.get(old)
+            if item is not None and item.type == 'doc' and self._replaced_component(item, new):
+                return
+
+            if not any(a is self.main for a in new.iterancestors()):
+                # new is, or contains, one or more components
+                self._rebuild(old)
+                return
+
+            # top-level items of the main component
+            component, siblings = 'main', self
+        else:
+            component, siblings = parent.component, parent.children
+
+        # items only have their TOC parent as context when they're directly
+        # inside it, see TOCBuilder.generate_toc
+        context = parent if parent is not None and new.getparent() is parent.element else None
+        new_items = self.builder.generate_toc(self.interesting, component, [new], parent=context)
+
+        # the items for old and its descendants are contiguous
+        start = end = None
+        for i, item in enumerate(siblings):
+            if item.element is old or any(a is old for a in item.element.iterancestors()):
+                if start is None:
+                    start = i
+                end = i + 1
+            elif start is not None:
+                break
+
+        if start is None:
+            if not new_items:
+                return
+
+            # we don't know where the new items belong, so rebuild this level
+            if parent is None:
+                start, end = 0, len([i for i in siblings if i.component == component])
+                new_items = self.builder.generate_toc(self.interesting, component, [self.main])
+            else:
+                start, end = 0, len(siblings)
+                new_items = self.builder.generate_toc(self.interesting, component, parent.element.iterchildren(), parent=parent)
+
+        self._forget(siblings[start:end])
+        siblings[start:end] = new_items
+        self._remember(new_items)
+
+    def _replaced_component(self, item, new):
+        # rebuild the item for a component doc, as TOCBuilder.table_of_contents does
+        paths = xpaths(self.namespace)
+        name = paths.component_name(new) if new.tag == '{%s}doc' % self.namespace else None
+        if not name:
+            return False
+
+        component = name[0].split('/')[-1]
+        new_item = self.builder.element(new, component)
+        new_item.children = self.builder.generate_toc(self.interesting, component, [new])
+
+        i = next(i for i, x in enumerate(self) if x is item)
+        self._forget([item])
+        self[i] = new_item
+        self._remember([new_item])
+        return True
+
+    def _rebuild(self, old):
+        if self.act is None:
+            raise ValueError("The table of contents can't be rebuilt without the act")
+
+        if self.act.act is old:
+            # find the new act element
+            self.act._init_root(self.act.root)
+
+        toc = self.builder.table_of_contents(self.act)
+        self[:] = toc
+        self.main = toc.main
+        self._items = toc._items
+
+    def detach(self):
+        """ A copy of this table of contents that doesn't refer to the XML document,
+        see :class:`DetachedTableOfContents`. """
+        return DetachedTableOfContents(self)
+
+    def write_json(self, fileobj):
+        """ Write this table of contents to ``fileobj`` as a JSON list of the items'
+        :meth:`TOCElement.as_dict` dicts. The JSON is written as it is generated, without building
+        the dicts first. """
+        write_json(self, fileobj)
+
+    def to_json(self):
+        """ This table of contents as a JSON string, see :meth:`write_json`. """
+        f = BytesIO()
+        write_json(self, f)
+        return f.getvalue()
+
+    def _remember(self, items):
+        for item in items:
+            self._items[item.element] = item
+            if item.children:
+                self._remember(item.children)
+
+    def _forget(self, items):
+        for item in items:
+            self._items.pop(item.element, None)
+            if item.children:
+                self._forget(item.children)
+
+
+def write_json(items, fileobj):
+    """ Write the :class:`TOCElement` instances in ``items``, and their children, to ``fileobj``
+    as JSON. The result is the same as ``json.dump([item.as_dict() for item in items], fileobj)``,
+    except that the keys of each item are always in the same order.
+    """
+    write = fileobj.write
+    string = encode_basestring_ascii
+
+    def write_items(items):
+        write('[')
+        first = True
+        for item in items:
+            if first:
+                first = False
             else:
-                subcomponent = ""
+                write(', ')
+
+            # only the subcomponent can be None
+            write('{"type": %s, "component": %s, "subcomponent": %s, "title": %s' % (
+                string(item.type), string(item.component),
+                'null' if item.subcomponent is None else string(item.subcomponent), string(item.title)))
+
+            if item.heading:
+                write(', "heading": ' + string(item.heading))
+            if item.num:
+                write(', "num": ' + string(item.num))
+            if item.id:
+                write(', "id": ' + string(item.id))
+            if item.children:
+                write(', "children": ')
+                write_items(item.children)
+            write('}')
+        write(']')
+
+    write_items(items)
+
+
+class TOCCache(object):
+    """ A cache of the tables of contents of documents, as JSON, keyed by a content hash of the
+    document's XML. Serving the table of contents of a document that hasn't changed is then a hash
+    and a lookup, and if the XML is given as a string, the document isn't parsed at all::
+
+        >>> tocs = TOCCache(Cache(path='/var/cache/cobalt-toc'))
+        >>> tocs.json(open('act.xml').read())
+        '[{"type": "section", ...'
+
+    :param cache: the :class:`cobalt.cache.Cache` to store the JSON in, defaults to a new in-memory
+                  cache. Use a cache with a ``path`` to keep the tables of contents on disk.
+    :param builder: the :class:`TOCBuilder` to build tables of contents with
+    """
 
-            # eg. 'preamble' or 'chapter/2'
-            subcomponent += type_
+    def __init__(self, cache=None, builder=None):
+        self.cache = cache if cache is not None else Cache()
+        self.builder = builder or TOCBuilder()
+        # the same document has a different table of contents with a differently configured builder
+        self.fingerprint = content_hash(self.builder.__class__.__name__, ' '.join(self.builder.toc_components),
+                                        ' '.join(self.builder.toc_non_unique_components))
 
-            if num:
-                subcomponent += '/' + num.strip('.()')
+    def json(self, document):
+        """ Get the table of contents of ``document`` as a JSON string, see :meth:`TableOfContents.write_json`.
 
-        return TOCElement(element, component, type_, heading=heading, id_=id_,
-                          num=num, subcomponent=subcomponent, parent=parent)
+        :param document: the XML of an act as a string, or an :class:`cobalt.act.Act`. XML strings are
+                         only parsed if their table of contents isn't cached.
+        """
+        act = None
+        if isinstance(document, basestring):
+            xml = document.encode('utf-8') if isinstance(document, unicode) else document
+        else:
+            act = document
+            xml = etree.tostring(act.root, encoding='utf-8')
+
+        key = content_hash(self.fingerprint, xml)
+        value = self.cache.get(key)
+        if value is None:
+            if act is None:
+                from .act import Act
+                act = Act.from_bytes(xml, lean=True)
+            value = act.table_of_contents(self.builder).to_json()
+            self.cache.set(key, value)
+
+        return value
+
+    def write_json(self, document, fileobj):
+        """ Write the table of contents of ``document`` to ``fileobj`` as JSON, see :meth:`json`. """
+        fileobj.write(self.json(document))
 
 
 class TOCElement(object):
@@ -114,7 +417,8 @@ class TOCElement(object):
     An element in the table of contents of a document, such as a chapter, part or section.
 
     :ivar children: further TOC elements contained in this one, may be None or empty
-    :ivar element: :class:`lxml.objectify.ObjectifiedElement` the XML element of this TOC element
+    :ivar element: :class:`lxml.objectify.ObjectifiedElement` the XML element of this TOC element,
+                   or a plain :mod:`lxml.etree` element for lean documents
     :ivar heading: heading for this element, excluding the number, may be None
     :ivar id: XML id string of the node in the document, may be None
     :ivar num: number of this element, as a string, may be None
@@ -122,6 +426,7 @@ class TOCElement(object):
     :ivar subcomponent: name of this subcomponent, used by :meth:`cobalt.act.Act.get_subcomponent`, may be None
     :ivar type: element type, one of: ``chapter, part, section`` etc.
     """
+    __slots__ = ('element', 'component', 'type', 'heading', 'id', 'num', 'children', 'subcomponent', '_title')
 
     def __init__(self, element, component, type_, heading=None, id_=None, num=None, subcomponent=None, parent=None, children=None):
         self.element = element
@@ -132,7 +437,18 @@ class TOCElement(object):
         self.num = num
         self.children = children
         self.subcomponent = subcomponent
-        self.title = self.friendly_title()
+        self._title = None
+
+    @property
+    def title(self):
+        """ Friendly title for this element, built by :meth:`friendly_title` when it is first used. """
+        if self._title is None:
+            self._title = self.friendly_title()
+        return self._title
+
+    @title.setter
+    def title(self, value):
+        self._title = value
 
     def as_dict(self):
         info = {
@@ -159,29 +475,132 @@ class TOCElement(object):
     def friendly_title(self):
         """ Build a friendly title for this, based on heading names etc.
         """
-        if self.type in ['chapter', 'part']:
-            title = self.type.capitalize()
-            if self.num:
-                title += ' ' + self.num
-            if self.heading:
-                title += ' - ' + self.heading
-
-        elif self.type == 'section':
-            if self.heading:
-                title = self.heading
-                if self.num:
-                    title = self.num + ' ' + title
-            else:
-                title = 'Section'
-                if self.num:
-                    title = title + ' ' + self.num
+        return friendly_title(self.type, self.num, self.heading)
+
 
-        elif self.heading:
-            title = self.heading
+def friendly_title(type_, num=None, heading=None):
+    """ A friendly title for a table of contents item of type ``type_``, such as ``Chapter 2 - Definitions``. """
+    if type_ in ['chapter', 'part']:
+        title = type_.capitalize()
+        if num:
+            title += ' ' + num
+        if heading:
+            title += ' - ' + heading
 
+    elif type_ == 'section':
+        if heading:
+            title = heading
+            if num:
+                title = num + ' ' + title
         else:
-            title = self.type.capitalize()
-            if self.num:
-                title += u' ' + self.num
+            title = 'Section'
+            if num:
+                title = title + ' ' + num
+
+    elif heading:
+        title = heading
+
+    else:
+        title = type_.capitalize()
+        if num:
+            title += u' ' + num
+
+    return title
+
+
+class DetachedTableOfContents(object):
+    """ A table of contents that doesn't refer to the XML document, as returned by
+    :meth:`TableOfContents.detach`. It is much smaller than a :class:`TableOfContents`,
+    and it can be cached and pickled, and sent between processes::
+
+        >>> detached = act.table_of_contents().detach()
+        >>> data = pickle.dumps(detached, pickle.HIGHEST_PROTOCOL)
+
+    The items are stored in flat lists, in document order, where each item is followed by
+    its descendants. Item ``i`` is described by ``types[i]``, ``nums[i]`` and so on, and
+    ``parents[i]`` is the index of its parent, or -1 for top-level items.
+
+    :ivar parents: :class:`array.array` of parent indexes
+    :ivar types: types of the items, such as ``chapter`` or ``section``
+    :ivar components: components the items are part of, such as ``main``
+    :ivar nums: numbers of the items, which may be None
+    :ivar headings: headings of the items, which may be None
+    :ivar ids: XML ids of the items, which may be None
+    :ivar subcomponents: subcomponent paths of the items, which may be None
+    """
+
+    def __init__(self, items=()):
+        self.parents = array('i')
+        self.types = []
+        self.components = []
+        self.nums = []
+        self.headings = []
+        self.ids = []
+        self.subcomponents = []
+
+        # there are only a few different types and components, so share them
+        self._strings = {}
+        self._add(items, -1)
+        del self._strings
+
+    def _add(self, items, parent):
+        strings = self._strings
+        for item in items:
+            index = len(self.types)
+            self.parents.append(parent)
+            self.types.append(strings.setdefault(item.type, item.type))
+            self.components.append(strings.setdefault(item.component, item.component))
+            self.nums.append(item.num)
+            self.headings.append(item.heading)
+            self.ids.append(item.id)
+            self.subcomponents.append(item.subcomponent)
+
+            if item.children:
+                self._add(item.children, index)
+
+    def __len__(self):
+        return len(self.types)
+
+    def title(self, i):
+        """ The friendly title of item ``i``, see :meth:`TOCElement.friendly_title`. """
+        return friendly_title(self.types[i], self.nums[i], self.headings[i])
+
+    def children(self, i=-1):
+        """ The indexes of the children of item ``i``, or of the top-level items if ``i`` is -1. """
+        parents = self.parents
+        children = []
+        # descendants of i come straight after it and have parents at or after i
+        for j in xrange(i + 1, len(parents)):
+            parent = parents[j]
+            if parent < i:
+                break
+            if parent == i:
+                children.append(j)
+        return children
+
+    def items(self):
+        """ The items as a tree of :class:`TOCElement` instances, like those of a
+        :class:`TableOfContents`, except that their ``element`` is None. """
+        items = []
+        elements = []
+
+        for i, parent in enumerate(self.parents):
+            item = TOCElement(None, self.components[i], self.types[i], heading=self.headings[i], id_=self.ids[i],
+                              num=self.nums[i], subcomponent=self.subcomponents[i], children=[])
+            elements.append(item)
+            if parent < 0:
+                items.append(item)
+            else:
+                elements[parent].children.append(item)
+
+        return items
+
+    def write_json(self, fileobj):
+        """ Write this table of contents to ``fileobj`` as JSON, see :meth:`TableOfContents.write_json`. """
+        write_json(self.items(), fileobj)
 
-        return title
+    def to_json(self):
+        """ This table of contents as a JSON string, see :meth:`TableOfContents.write_json`. """
+        f = BytesIO()
+        self.write_json(f)
+        return f.getvalue()
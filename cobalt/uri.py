@@ -1,4 +1,9 @@
 import re
+import operator
+
+from . import instrument
+# checked directly on the hot path of FrbrUri.parse
+from .instrument import hooks as _hooks
 
 FRBR_URI_RE = re.compile(r"""^/(?P<country>[a-z]{2})       # country
                               (-(?P<locality>[^/]+))?      # locality code
@@ -82,12 +87,25 @@ class FrbrUri(object):
     :ivar expression_subcomponent: name of the expression subcomponent, may be None
     :ivar format: format extension, may be None
 
+    URIs compare equal if all their components are equal, and can be used as dict keys.
+    Remember that changing a URI changes its hash, use :meth:`freeze` to get an
+    immutable :class:`FrozenFrbrUri` that is safe to share.
+
     .. seealso::
 
        http://akresolver.cs.unibo.it/admin/documentation.html
        http://www.akomantoso.org/release-notes/akoma-ntoso-3.0-schema/naming-conventions-1/bungenihelpcenterreferencemanualpage.2008-01-09.1484954524
     """
 
+    # components of the URI, in the same order as the arguments to __init__
+    fields = ('country', 'locality', 'doctype', 'subtype', 'actor', 'date', 'number',
+              'work_component', 'language', 'expression_date', 'expression_component',
+              'expression_subcomponent', 'format')
+
+    # _values is only used by FrozenFrbrUri, but must be here so that an FrbrUri
+    # can be turned into a FrozenFrbrUri by changing its class
+    __slots__ = fields + ('_values',)
+
     default_language = 'eng'
 
     def __init__(self, country, locality, doctype, subtype, actor, date, number,
@@ -109,19 +127,17 @@ class FrbrUri(object):
         self.format = format
 
     def clone(self):
-        return FrbrUri(
-            self.country,
-            self.locality,
-            self.doctype,
-            self.subtype,
-            self.actor,
-            self.date,
-            self.number,
-            self.language,
-            self.expression_date,
-            self.expression_component,
-            self.format,
-        )
+        """ A mutable copy of this URI. """
+        return FrbrUri(*self.values())
+
+    def freeze(self):
+        """ An immutable copy of this URI, as a :class:`FrozenFrbrUri`. """
+        return FrozenFrbrUri(*self.values())
+
+    def values(self):
+        """ Tuple of the values of all the components of this URI, in the same order as
+        the arguments to the constructor. """
+        return _get_values(self)
 
     def uri(self):
         """ String form of the work URI, excluding the work component, if any. """
@@ -176,11 +192,172 @@ class FrbrUri(object):
     def __str__(self):
         return self.work_uri()
 
+    def __eq__(self, other):
+        return isinstance(other, FrbrUri) and self.values() == other.values()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.values())
+
+    def __reduce__(self):
+        return (self.__class__, self.values())
+
+    @classmethod
+    def parse(cls, s, frozen=False):
+        """ Parse a string into a URI.
+
+        Parsed URIs are cached, so parsing the same string again is cheap.
+
+        :param s: the string to parse
+        :param frozen: return a shared :class:`FrozenFrbrUri` rather than a new, mutable copy
+        :raises ValueError: if the URI is invalid
+        """
+        if _hooks:
+            start = instrument.clock()
+            uri = _parse_cache.get(s, parse=cls._parse)
+            instrument.notify('uri.parse', start, size=len(s))
+        else:
+            uri = _parse_cache.get(s, parse=cls._parse)
+
+        if frozen:
+            return uri
+        return cls(*uri.values())
+
+    @classmethod
+    def parse_many(cls, uris):
+        """ Parse many strings into a :class:`FrbrUriColumns`, which has a list of values for
+        each component of a URI. This is much faster than calling :meth:`parse` for each string,
+        because no objects are created for each URI.
+
+        Invalid URIs don't raise an exception, instead their entry in the ``valid`` column
+        is False and their other values are None. Items that aren't strings, such as None,
+        are treated as invalid URIs.
+
+        :param uris: an iterable of strings
+        :rtype: :class:`FrbrUriColumns`
+        """
+        names = cls.fields
+        invalid = (None,) * len(names)
+        match = FRBR_URI_RE.match
+
+        rows = []
+        for s in uris:
+            m = match(s.rstrip('/')) if isinstance(s, basestring) else None
+            rows.append(m.group(*names) if m else invalid)
+
+        return FrbrUriColumns(rows, cls.default_language)
+
     @classmethod
-    def parse(cls, s):
-        s = s.rstrip('/')
-        match = FRBR_URI_RE.match(s)
+    def _parse(cls, s):
+        match = FRBR_URI_RE.match(s.rstrip('/'))
         if match:
-            return cls(**match.groupdict())
+            return FrozenFrbrUri(**match.groupdict())
         else:
-            raise ValueError("Invalid FRBR URI: %s" % s)
+            raise ValueError("Invalid FRBR URI: %s" % s.rstrip('/'))
+
+
+class FrozenFrbrUri(FrbrUri):
+    """ An immutable :class:`FrbrUri`, which can be safely shared and used as a dict key.
+    Use :meth:`FrbrUri.clone` to get a mutable copy. """
+
+    __slots__ = ()
+
+    def __new__(cls, *args, **kwargs):
+        # Build a normal FrbrUri and then freeze it by changing its class, which is much
+        # quicker than setting each attribute around our __setattr__.
+        uri = FrbrUri(*args, **kwargs)
+        uri._values = _get_values(uri)
+        uri.__class__ = cls
+        return uri
+
+    def __init__(self, *args, **kwargs):
+        # already done by __new__
+        pass
+
+    def values(self):
+        return self._values
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenFrbrUri instances are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("FrozenFrbrUri instances are immutable")
+
+    def freeze(self):
+        return self
+
+
+_get_values = operator.attrgetter(*FrbrUri.fields)
+
+
+class FrbrUriColumns(object):
+    """ Many parsed URIs, stored as a list of values for each component,
+    as returned by :meth:`FrbrUri.parse_many`.
+
+    There is an attribute for each component of :class:`FrbrUri`, such as ``country``
+    and ``number``, and a list of booleans called ``valid``. Entry ``i`` in each list
+    is for the ``i``-th URI that was parsed.
+
+    Use ``columns[i]`` to get the ``i``-th URI as a :class:`FrbrUri`, or None if it is invalid.
+    """
+
+    def __init__(self, rows, default_language='eng'):
+        columns = zip(*rows) or [()] * len(FrbrUri.fields)
+        for name, values in zip(FrbrUri.fields, columns):
+            setattr(self, name, list(values))
+
+        self.valid = [c is not None for c in self.country]
+        # as with FrbrUri, language defaults to the default language
+        self.language = [lang or default_language if ok else None for lang, ok in zip(self.language, self.valid)]
+
+    def __len__(self):
+        return len(self.valid)
+
+    def __getitem__(self, i):
+        if self.valid[i]:
+            return FrbrUri(*(getattr(self, name)[i] for name in FrbrUri.fields))
+
+
+class ParseCache(object):
+    """ A bounded cache of parsed URIs which approximates least-recently-used eviction
+    while keeping lookups as cheap as a dict lookup.
+
+    Entries are added to the current generation. When it holds ``size / 2`` entries, it
+    becomes the old generation and the previous old generation is discarded. Entries found in
+    the old generation are promoted to the current one, so anything used recently survives.
+    """
+
+    def __init__(self, size=100000):
+        self.size = size
+        self.current = {}
+        self.old = {}
+
+    def get(self, key, parse=None):
+        """ Get the cached value for ``key``. If it isn't cached, return None, or
+        cache and return ``parse(key)`` if ``parse`` is given. """
+        try:
+            return self.current[key]
+        except KeyError:
+            pass
+
+        value = self.old.get(key)
+        if value is None:
+            if parse is None:
+                return None
+            value = parse(key)
+
+        if len(self.current) >= self.size / 2:
+            self.old = self.current
+            self.current = {}
+        self.current[key] = value
+
+        return value
+
+    def clear(self):
+        self.current = {}
+        self.old = {}
+
+
+_parse_cache = ParseCache()
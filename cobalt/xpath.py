@@ -0,0 +1,90 @@
+""" Precompiled XPath expressions for querying Akoma Ntoso documents.
+
+Get the expressions for a document's namespace with :func:`xpaths`. Each expression is an
+:class:`lxml.etree.XPath` that is called with the element to start from, and any variables
+it uses, such as ids, are passed as keyword arguments::
+
+    >>> paths = xpaths(act.namespace)
+    >>> paths.events(act.meta, type='amendment')
+    [<Element {http://www.akomantoso.org/2.0}eventRef at 0x...>]
+
+The expressions are compiled once for each namespace and shared, since lxml's XPath objects can
+be used by many threads at once. Elements in the document's namespace use the ``a`` prefix.
+"""
+from lxml import etree
+
+
+# shared registries, keyed by namespace, see xpaths
+_registries = {}
+
+
+def xpaths(namespace):
+    """ Get the :class:`XPaths` for documents in ``namespace``. """
+    try:
+        return _registries[namespace]
+    except KeyError:
+        registry = _registries[namespace] = XPaths(namespace)
+        return registry
+
+
+class XPaths(object):
+    """ The XPath expressions used by cobalt, compiled for documents in ``namespace``.
+    Each entry in :attr:`expressions` is available as an attribute of the same name.
+
+    Expressions that select attributes return plain strings, rather than lxml's "smart"
+    strings, so that the results don't keep the document alive.
+    """
+
+    # name -> XPath expression. Elements are described by where the expression starts.
+    expressions = {
+        # from the akomaNtoso root
+        'act': 'a:act[1]',
+        'components': 'a:components/a:component/a:doc',
+        'ids': 'descendant::*[@id]',
+
+        # from the act or the doc of a component
+        'identification': 'a:meta[1]/a:identification[1]',
+        'component_name': 'a:meta[1]/a:identification[1]/a:FRBRWork[1]/a:FRBRthis[1]/@value',
+        'alias': 'a:meta[1]//a:FRBRalias/@value',
+
+        # from meta
+        'events': 'a:lifecycle[1]/a:eventRef[@type = $type]',
+
+        # from references
+        'passive_refs': 'a:passiveRef',
+        'reference': 'a:*[local-name() = $tag and @id = $id]',
+
+        # from TOC elements
+        'num': 'a:num[1]',
+        'heading': 'a:heading[1]',
+
+        # from any element, the text it contains
+        'text': 'string()',
+    }
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.namespaces = {'a': namespace}
+        # dotted path -> XPath, see path
+        self._paths = {}
+
+        for name, expression in self.expressions.iteritems():
+            setattr(self, name, self.compile(expression))
+
+    def compile(self, expression):
+        """ Compile an XPath ``expression`` that uses the ``a`` prefix for this namespace. """
+        return etree.XPath(expression, namespaces=self.namespaces, smart_strings=False)
+
+    def path(self, name):
+        """ The expression for the dotted path ``name``, such as ``identification.FRBRWork.FRBRuri``.
+        Each step selects the first child with that name, like :mod:`lxml.objectify`'s attribute access. """
+        try:
+            return self._paths[name]
+        except KeyError:
+            path = self._paths[name] = self.compile('/'.join('a:%s[1]' % p for p in name.split('.')))
+            return path
+
+    def first(self, xpath, element, **variables):
+        """ The first result of evaluating ``xpath`` from ``element``, or None. """
+        result = xpath(element, **variables)
+        return result[0] if result else None
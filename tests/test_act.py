@@ -1,8 +1,19 @@
 from unittest import TestCase
 from nose.tools import *  # noqa
 from datetime import date
+from io import BytesIO
+import gzip
+import json
+import pickle
+import shutil
+import tempfile
 
-from cobalt.act import Act, datestring, AmendmentEvent, RepealEvent
+from lxml import etree, objectify
+
+from cobalt.act import Act, datestring, parse_date, AmendmentEvent, RepealEvent
+from cobalt.uri import FrbrUri
+from cobalt.cache import Cache
+from cobalt.toc import TOCCache, TOCElement, write_json as write_toc_json
 
 class ActTestCase(TestCase):
     def test_empty_act(self):
@@ -30,6 +41,42 @@ class ActTestCase(TestCase):
         assert_equal(a.meta.identification.FRBRManifestation.FRBRuri.get('value'), '/zm/act/2007/01/eng@2012-01-01')
         
 
+    def test_frbr_uri_frozen(self):
+        uri = FrbrUri.parse('/zm/act/2007/01', frozen=True)
+        a = Act()
+        a.expression_date = '2012-01-01'
+        a.frbr_uri = uri
+
+        assert_equal(a.frbr_uri.work_uri(), '/zm/act/2007/01')
+        assert_equal(a.meta.identification.FRBRExpression.FRBRthis.get('value'), '/zm/act/2007/01/eng@2012-01-01/main')
+        # the shared URI isn't changed
+        assert_is_none(uri.expression_date)
+        assert_is_none(uri.work_component)
+        assert_equal(uri.language, 'eng')
+        assert_equal(uri.expression_uri(), '/zm/act/2007/01/eng')
+
+    def test_create(self):
+        a = Act.create(frbr_uri='/zm/act/2007/01', title='Created', work_date='2007-01-01',
+                       expression_date='2012-01-01', language='fre')
+
+        assert_equal(a.title, 'Created')
+        assert_equal(a.work_date, date(2007, 1, 1))
+        assert_equal(a.expression_date, date(2012, 1, 1))
+        assert_equal(a.language, 'fre')
+        assert_equal(a.meta.identification.FRBRExpression.FRBRthis.get('value'), '/zm/act/2007/01/fre@2012-01-01/main')
+        assert_equal(a.meta.identification.FRBRManifestation.FRBRuri.get('value'), '/zm/act/2007/01/fre@2012-01-01')
+
+    def test_empty_acts_are_independent(self):
+        a = Act()
+        a.title = 'Changed'
+        a.body_xml = ''
+        a.body.section.set('id', 'changed')
+
+        b = Act()
+        assert_equal(b.title, 'Untitled')
+        b.body_xml = ''
+        assert_equal(b.body.section.get('id'), 'section-1')
+
     def test_empty_body(self):
         a = Act()
         assert_not_equal(a.body_xml, '')
@@ -48,6 +95,12 @@ class ActTestCase(TestCase):
         assert_equal(datestring(a.expression_date), '2012-01-02')
         assert_is_instance(a.expression_date, date)
 
+    def test_parse_date(self):
+        assert_equal(parse_date('2012-01-02'), date(2012, 1, 2))
+        assert_equal(parse_date(u'0999-12-31'), date(999, 12, 31))
+        assert_equal(parse_date('2012-01-02T10:00:00'), date(2012, 1, 2))
+        assert_raises(ValueError, parse_date, '2012-02-31')
+
     def test_manifestation_date(self):
         a = Act()
         a.manifestation_date = '2012-01-02'
@@ -76,6 +129,17 @@ class ActTestCase(TestCase):
         a.publication_name = 'Publication'
         assert_equal(a.publication_name, 'Publication')
 
+    def test_cached_elements(self):
+        a = Act()
+        assert_is_none(a.publication_name)
+        a.publication_name = 'Publication'
+        assert_equal(a.publication_name, 'Publication')
+
+        # changing the XML directly
+        a.meta.remove(a.meta.publication)
+        a.clear_caches()
+        assert_is_none(a.publication_name)
+
     def test_language(self):
         a = Act()
         a.language = 'fre'
@@ -127,6 +191,116 @@ class ActTestCase(TestCase):
             },
             ])
 
+    def test_table_of_contents_replaced_clears_caches(self):
+        a = Act(act_fixture("""
+        <body>
+          <section id="section-1"><num>1.</num><heading>Foo</heading></section>
+          <section id="section-2"><num>2.</num><heading>Other</heading></section>
+        </body>
+        """))
+        toc = a.table_of_contents()
+        old = a.get_subcomponent('main', 'section/2')
+        assert_is(a.get_element_by_id('section-2'), old)
+
+        new = objectify.fromstring('<section xmlns="http://www.akomantoso.org/2.0" id="section-2">'
+                                   '<num>2.</num><heading>Changed</heading></section>')
+        old.getparent().replace(old, new)
+        toc.replaced(old, new)
+
+        assert_is(a.get_subcomponent('main', 'section/2'), new)
+        assert_is(a.get_element_by_id('section-2'), new)
+        assert_equal(toc[1].heading, 'Changed')
+
+    def test_incremental_table_of_contents(self):
+        from lxml import objectify
+
+        a = Act()
+        a.body_xml = """
+        <body xmlns="http://www.akomantoso.org/2.0">
+          <section id="section-1"><num>1.</num><heading>Foo</heading></section>
+          <chapter id="chapter-1">
+            <num>1</num>
+            <part id="part-A">
+              <num>A</num>
+              <section id="section-2"><num>2.</num><heading>Other</heading><content><p>hi</p></content></section>
+            </part>
+          </chapter>
+          <section id="section-3"><num>3.</num><content><p>hi</p></content></section>
+        </body>
+        """
+        toc = a.table_of_contents()
+
+        def replace(old, xml):
+            new = objectify.fromstring('<x xmlns="http://www.akomantoso.org/2.0">%s</x>' % xml).getchildren()[0]
+            old.getparent().replace(old, new)
+            a.clear_caches()
+            toc.replaced(old, new)
+            assert_equal([t.as_dict() for t in toc], [t.as_dict() for t in a.table_of_contents()])
+
+        # a section in a part
+        replace(a.get_subcomponent('main', 'section/2'),
+                '<section id="section-2"><num>2A.</num><heading>Changed</heading></section>')
+        assert_equal(toc[1].children[0].children[0].title, '2A. Changed')
+
+        # a nested chapter/part
+        replace(a.get_subcomponent('main', 'chapter/1/part/A'),
+                '<part id="part-B"><num>B</num><chapter id="chapter-2"><num>2</num></chapter></part>')
+        assert_equal(toc[1].children[0].children[0].subcomponent, 'chapter/1/part/B/chapter/2')
+
+        # a non-TOC element which now has TOC elements inside it
+        replace(a.get_subcomponent('main', 'section/3').content,
+                '<content><section id="section-4"><num>4.</num></section></content>')
+
+        # the whole body
+        replace(a.body, '<body><section id="section-5"><num>5.</num></section></body>')
+        assert_equal(len(toc), 1)
+
+    def test_incremental_table_of_contents_components(self):
+        from copy import deepcopy
+
+        a = Act(act_fixture("""
+        <body>
+          <chapter id="chapter-1"><num>1</num><section id="section-1"><num>1.</num></section></chapter>
+          <section id="section-2"><num>2.</num></section>
+        </body>
+        """))
+        components = objectify.SubElement(a.root, '{http://www.akomantoso.org/2.0}components')
+        for i in [1, 2]:
+            component = objectify.fromstring("""
+            <component xmlns="http://www.akomantoso.org/2.0" id="component-%(i)d">
+              <doc name="schedule%(i)d">
+                <meta><identification><FRBRWork><FRBRthis value="/za/act/1980/01/schedule%(i)d"/></FRBRWork></identification></meta>
+                <mainBody><section id="schedule%(i)d.section-1"><num>1.</num></section></mainBody>
+              </doc>
+            </component>""" % {'i': i})
+            components.append(component)
+        toc = a.table_of_contents()
+
+        def replace(old, new):
+            old.getparent().replace(old, new)
+            toc.replaced(old, new)
+            fresh = Act(etree.tostring(a.root)).table_of_contents()
+            assert_equal([t.as_dict() for t in toc], [t.as_dict() for t in fresh])
+
+        # a schedule
+        doc = a.components()['schedule1']
+        new = deepcopy(doc)
+        new.mainBody.section.num._setText('1A.')
+        replace(doc, new)
+        assert_equal([t.component for t in toc], ['main', 'main', 'schedule1', 'schedule2'])
+        assert_equal(toc[2].children[0].num, '1A.')
+        assert_is(a.get_subcomponent('schedule1', 'section/1A'), new.mainBody.section)
+
+        # all the components
+        replace(components, deepcopy(components))
+
+        # the act
+        new = deepcopy(a.act)
+        new.body.section.num._setText('2A.')
+        replace(a.act, new)
+        assert_is(a.act, new)
+        assert_is(a.get_subcomponent('main', 'section/2A'), new.body.section)
+
     def test_component_table_of_contents(self):
         a = Act("""
 <akomaNtoso xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns="http://www.akomantoso.org/2.0" xsi:schemaLocation="http://www.akomantoso.org/2.0 akomantoso20.xsd">
@@ -305,6 +479,48 @@ class ActTestCase(TestCase):
         assert_is_none(a.get_subcomponent('main', 'chapter/99'))
         assert_is_none(a.get_subcomponent('main', 'section/99'))
 
+    def test_get_subcomponent_nested(self):
+        a = Act()
+        a.body_xml = """
+        <body xmlns="http://www.akomantoso.org/2.0">
+          <part id="part-1">
+            <num>1</num>
+            <chapter id="part-1.chapter-1">
+              <num>1</num>
+              <section id="section-1"><num>1.</num></section>
+            </chapter>
+          </part>
+          <part id="part-2">
+            <num>2</num>
+            <chapter id="part-2.chapter-1">
+              <num>1</num>
+              <section id="section-2"><num>2.</num></section>
+            </chapter>
+          </part>
+        </body>
+        """
+        assert_equal(a.get_subcomponent('main', 'part/2/chapter/1').get('id'), 'part-2.chapter-1')
+        assert_equal(a.get_subcomponent('main', 'section/2').get('id'), 'section-2')
+        assert_is_none(a.get_subcomponent('main', 'chapter/1'))
+
+        def check(items):
+            for item in items:
+                assert_is(a.get_subcomponent(item.component, item.subcomponent), item.element)
+                check(item.children or [])
+        check(a.table_of_contents())
+
+        assert_equal(a.get_element_by_id('part-1.chapter-1').num, 1)
+        assert_is_none(a.get_element_by_id('section-99'))
+
+        a.body_xml = """
+        <body xmlns="http://www.akomantoso.org/2.0">
+          <section id="section-99"><num>99.</num></section>
+        </body>
+        """
+        assert_is_none(a.get_subcomponent('main', 'section/2'))
+        assert_equal(a.get_subcomponent('main', 'section/99').get('id'), 'section-99')
+        assert_is_not_none(a.get_element_by_id('section-99'))
+
     def test_set_amendments(self):
         a = Act()
         a.body_xml = """
@@ -407,6 +623,26 @@ class ActTestCase(TestCase):
         assert_equal(amendment.amending_uri, '/za/act/1990/5')
         assert_equal(amendment.amending_title, 'Bar')
 
+    def test_add_and_remove_amendments(self):
+        a = Act()
+        a.add_amendments([
+            AmendmentEvent(date='2013-03-03', amending_uri='/za/act/1990/5', amending_title="Bar"),
+            AmendmentEvent(date='2012-02-01', amending_uri='/za/act/1980/22', amending_title="Foo"),
+        ])
+        a.add_amendments([AmendmentEvent(date='2012-02-01', amending_uri='/za/act/1980/23', amending_title="Baz")])
+        assert_equal(a.act.get('contains'), 'singleVersion')
+        assert_equal([(datestring(e.date), e.amending_title) for e in a.amendments],
+                     [('2012-02-01', 'Foo'), ('2012-02-01', 'Baz'), ('2013-03-03', 'Bar')])
+        assert_equal(len(a.meta.references.passiveRef), 3)
+
+        a.remove_amendments([AmendmentEvent(date='2012-02-01', amending_uri='/za/act/1980/23')])
+        assert_equal([e.amending_title for e in a.amendments], ['Foo', 'Bar'])
+
+        a.remove_amendments([AmendmentEvent(date='2012-02-01'), AmendmentEvent(date='2013-03-03')])
+        assert_equal(a.amendments, [])
+        assert_equal(a.act.get('contains'), 'originalVersion')
+        assert_equal(a.meta.references.find('{*}passiveRef'), None)
+
     def test_set_repeal(self):
         a = Act()
         a.body_xml = """
@@ -462,6 +698,404 @@ class ActTestCase(TestCase):
         a.repeal = None
         assert_is_none(a.repeal)
 
+    def test_load_meta(self):
+        a = Act()
+        a.title = "Meta only"
+        a.frbr_uri = '/za/act/2010/5'
+        a.amendments = [AmendmentEvent(date='2012-02-01', amending_uri='/za/act/1980/10', amending_title="Foo")]
+
+        meta = Act.load_meta(a.to_xml())
+        assert_is_none(meta.body)
+        assert_equal(meta.title, "Meta only")
+        assert_equal(meta.frbr_uri.work_uri(), '/za/act/2010/5')
+        assert_equal(meta.expression_date, a.expression_date)
+        assert_equal(meta.amendments[0].amending_title, "Foo")
+        assert_is_none(meta.repeal)
+
+        full = meta.load()
+        assert_is_instance(full, Act)
+        assert_equal(full.to_xml(), a.to_xml())
+
+    def test_load_meta_components(self):
+        xml = COMPONENTS_DOCUMENT
+
+        with tempfile.NamedTemporaryFile(suffix='.xml') as f:
+            f.write(xml)
+            f.flush()
+
+            meta = Act.load_meta(f.name)
+            assert_equal(meta.components().keys(), ['main', 'schedule1'])
+            assert_is_none(meta.components()['schedule1'].find('{*}mainBody'))
+
+            meta = Act.load_meta(f.name, components=False)
+            assert_equal(meta.components().keys(), ['main'])
+            assert_equal(meta.title, "Untitled")
+
+            assert_equal(meta.load().components().keys(), ['main', 'schedule1'])
+
+
+    def test_load_meta_components_encoding(self):
+        xml = COMPONENTS_DOCUMENT.replace('<?xml version="1.0"?>', '<?xml version="1.0" encoding="ISO-8859-1"?>')
+        xml = xml.replace('A Title', u'Caf\xe9'.encode('iso-8859-1'))
+        meta = Act.load_meta(xml)
+        assert_equal(meta.components().keys(), ['main', 'schedule1'])
+        assert_equal(meta.components()['schedule1'].meta.identification.FRBRWork.FRBRalias.get('value'), u'Caf\xe9')
+
+    def test_load_meta_components_prefixed(self):
+        # the act isn't in the default namespace, so the whole document is parsed
+        xml = COMPONENTS_DOCUMENT.replace('<akomaNtoso xmlns=', '<akomaNtoso xmlns:akn="http://www.akomantoso.org/2.0" xmlns=')
+        xml = xml.replace('<act ', '<akn:act ').replace('</act>', '</akn:act>')
+        meta = Act.load_meta(xml)
+        assert_equal(meta.title, "Untitled")
+        assert_equal(meta.components().keys(), ['main', 'schedule1'])
+        assert_is_none(meta.components()['schedule1'].find('{*}mainBody'))
+
+    def test_write(self):
+        a = Act(COMPONENTS_DOCUMENT)
+
+        f = BytesIO()
+        a.write(f)
+        assert_equal(etree.tostring(etree.fromstring(f.getvalue())), etree.tostring(a.root))
+
+        f = BytesIO()
+        a.write(f, pretty=True)
+        assert_equal(Act(f.getvalue()).to_xml(), a.to_xml())
+
+        f = BytesIO()
+        a.write(f, compress=True)
+        assert_equal(Act(gzip.GzipFile(fileobj=BytesIO(f.getvalue())).read()).to_xml(), a.to_xml())
+
+        with tempfile.NamedTemporaryFile(suffix='.xml') as tmp:
+            a.write(tmp.name)
+            assert_equal(Act(open(tmp.name).read()).to_xml(), a.to_xml())
+
+    def test_write_components(self):
+        a = Act(COMPONENTS_DOCUMENT)
+
+        f = BytesIO()
+        a.write(f, components=['main'])
+        written = Act(f.getvalue())
+        assert_equal(written.components().keys(), ['main'])
+        assert_equal(written.body_xml, a.body_xml)
+        assert_is_none(written.root.find('{*}components'))
+
+        f = BytesIO()
+        a.write(f, components=['schedule1'])
+        written = etree.fromstring(f.getvalue())
+        assert_is_none(written.find('{*}act'))
+        assert_equal(written.find('{*}components/{*}component').get('id'), 'component-1')
+        assert_equal(etree.tostring(written.find('.//{*}doc')), etree.tostring(a.components()['schedule1']))
+
+    def test_from_file_bytes_and_mmap(self):
+        a = Act(COMPONENTS_DOCUMENT)
+
+        with tempfile.NamedTemporaryFile(suffix='.xml') as f:
+            f.write(COMPONENTS_DOCUMENT)
+            f.flush()
+
+            for loaded in [Act.from_file(f.name), Act.from_file(open(f.name, 'rb')), Act.from_mmap(f.name),
+                           Act.from_bytes(COMPONENTS_DOCUMENT)]:
+                assert_is_instance(loaded, Act)
+                assert_equal(loaded.to_xml(), a.to_xml())
+                assert_equal(loaded.title, 'Untitled')
+                assert_equal(loaded.components().keys(), ['main', 'schedule1'])
+
+            # whitespace is kept if asked
+            loaded = Act.from_mmap(f.name, remove_blank_text=False)
+            assert_equal(loaded.root.text, '\n  ')
+
+    def test_huge_tree(self):
+        # deeper than libxml2 allows by default
+        xml = act_fixture('<body>%s%s</body>' % ('<div>' * 300, '</div>' * 300))
+
+        with assert_raises(etree.XMLSyntaxError):
+            Act(xml)
+        with assert_raises(etree.XMLSyntaxError):
+            Act.from_bytes(xml)
+
+        assert_equal(len(list(Act.from_bytes(xml, huge_tree=True).body.iter())), 301)
+        with tempfile.NamedTemporaryFile(suffix='.xml') as f:
+            f.write(xml)
+            f.flush()
+            assert_is_not_none(Act.from_file(f.name, huge_tree=True, lean=True).body)
+            assert_is_not_none(Act.from_mmap(f.name, huge_tree=True).body)
+
+    def test_from_bytes_encoding(self):
+        xml = act_fixture(u'<body><p>caf\xe9</p></body>').replace('<?xml version="1.0"?>', '<?xml version="1.0" encoding="utf-8"?>')
+        a = Act.from_bytes(xml.encode('utf-8'))
+        assert_equal(a.body.p.text, u'caf\xe9')
+        assert_equal(Act(xml).to_xml(), a.to_xml())
+        assert_equal(Act(xml.encode('utf-8')).to_xml(), a.to_xml())
+
+    def test_batch(self):
+        a = act_with_schedule()
+        b = act_with_schedule()
+        schedule = a.components()['schedule1']
+
+        with a.batch():
+            a.frbr_uri = '/za/act/2010/5'
+            a.language = 'fre'
+            with a.batch():
+                a.expression_date = '2012-01-01'
+            a.title = 'New title'
+
+            # the work URI is updated straight away, but not the components
+            assert_equal(a.frbr_uri.work_uri(), '/za/act/2010/5')
+            assert_equal(a.number, '5')
+            assert_equal(schedule.meta.identification.FRBRWork.FRBRthis.get('value'), '/za/act/1900/1/schedule1')
+
+        assert_equal(schedule.meta.identification.FRBRWork.FRBRthis.get('value'), '/za/act/2010/5/schedule1')
+        assert_equal(schedule.meta.identification.FRBRExpression.FRBRthis.get('value'), '/za/act/2010/5/fre@2012-01-01/schedule1')
+
+        b.frbr_uri = '/za/act/2010/5'
+        b.language = 'fre'
+        b.expression_date = '2012-01-01'
+        b.title = 'New title'
+        assert_equal(a.to_xml(), b.to_xml())
+
+    def test_update(self):
+        a = act_with_schedule()
+        a.update(frbr_uri='/za/act/2010/5', title='New title', language='fre', expression_date='2012-01-01',
+                 publication_name='Gazette')
+        assert_equal(a.title, 'New title')
+        assert_equal(a.publication_name, 'Gazette')
+        assert_equal(a.expression_date, date(2012, 1, 1))
+        assert_equal(a.meta.identification.FRBRExpression.FRBRthis.get('value'), '/za/act/2010/5/fre@2012-01-01/main')
+
+        with assert_raises(TypeError):
+            a.update(year='2010')
+        with assert_raises(TypeError):
+            a.update(foo='bar')
+
+    def test_lean(self):
+        a = act_with_schedule()
+        a.amendments = [AmendmentEvent(date='2012-02-01', amending_uri='/za/act/1980/10', amending_title="Foo")]
+        xml = a.to_xml()
+
+        lean = Act.from_bytes(xml, lean=True)
+        assert_true(lean.lean)
+        assert_false(a.lean)
+        assert_not_is_instance(lean.root, objectify.ObjectifiedElement)
+        assert_equal(lean.to_xml(), xml)
+
+        for prop in ['title', 'frbr_uri', 'expression_date', 'language', 'year', 'number', 'nature']:
+            assert_equal(getattr(lean, prop), getattr(a, prop))
+        assert_equal(lean.amendments[0].amending_title, 'Foo')
+        assert_equal(lean.components().keys(), ['main', 'schedule1'])
+        assert_equal([e.as_dict() for e in lean.table_of_contents()],
+                     [e.as_dict() for e in a.table_of_contents()])
+
+        # changes are the same too
+        for act in [a, lean]:
+            act.update(frbr_uri='/za/act/2010/5', language='fre', publication_name='Gazette')
+            act.repeal = RepealEvent(date='2014-01-01', repealing_uri='/za/act/2014/1', repealing_title='Bar')
+        assert_equal(lean.to_xml(), a.to_xml())
+        assert_not_is_instance(lean.meta.find('{*}publication'), objectify.ObjectifiedElement)
+
+        lean.body_xml = None
+        assert_equal(lean.body.tag, 'body')
+
+    def test_lean_loaders(self):
+        with tempfile.NamedTemporaryFile(suffix='.xml') as f:
+            f.write(COMPONENTS_DOCUMENT)
+            f.flush()
+
+            for loaded in [Act(COMPONENTS_DOCUMENT, lean=True), Act.from_file(f.name, lean=True),
+                           Act.from_mmap(f.name, lean=True), Act(lean=True)]:
+                assert_true(loaded.lean)
+                assert_equal(loaded.title, 'Untitled')
+
+            meta = Act.load_meta(f.name, lean=True)
+            assert_true(meta.lean)
+            assert_equal(meta.components().keys(), ['main', 'schedule1'])
+            assert_true(meta.load().lean)
+
+    def test_table_of_contents_json(self):
+        a = act_fixture(u"""
+        <body>
+          <section id="section-1">
+            <num>1.</num>
+            <heading>Caf\xe9 "licences"</heading>
+            <content><p>hello</p></content>
+          </section>
+          <chapter id="chapter-1">
+            <num>1</num>
+            <section>
+              <content><p>hi</p></content>
+            </section>
+          </chapter>
+        </body>
+        """)
+        a = Act(a)
+        a.root.append(act_with_schedule().root.find('{*}components'))
+        toc = a.table_of_contents()
+        assert_equal(len(toc), 3)
+
+        expected = [t.as_dict() for t in toc]
+        assert_equal(json.loads(toc.to_json()), expected)
+
+        f = BytesIO()
+        toc.write_json(f)
+        assert_equal(f.getvalue(), toc.to_json())
+
+        f = BytesIO()
+        write_toc_json([], f)
+        assert_equal(f.getvalue(), '[]')
+
+    def test_toc_element(self):
+        item = TOCElement(None, 'main', 'chapter', heading='Definitions', num='2')
+        assert_false(hasattr(item, '__dict__'))
+        assert_is_none(item._title)
+        assert_equal(item.title, 'Chapter 2 - Definitions')
+        item.title = 'Changed'
+        assert_equal(item.title, 'Changed')
+
+        # headings are plain strings that don't refer to the document
+        toc = Act(act_fixture('<body><section id="s1"><num>1.</num><heading>A <b>bold</b> heading</heading></section></body>'),
+                  lean=True).table_of_contents()
+        assert_equal(toc[0].heading, 'A bold heading')
+        assert_is(type(toc[0].heading), str)
+
+    def test_detached_table_of_contents(self):
+        a = Act(act_fixture("""
+        <body>
+          <section id="section-1"><num>1.</num><heading>Foo</heading></section>
+          <chapter id="chapter-1">
+            <num>1</num>
+            <part id="part-A">
+              <num>A</num>
+              <section id="section-2"><num>2.</num><heading>Other</heading></section>
+            </part>
+            <section id="section-3"><num>3.</num></section>
+          </chapter>
+        </body>
+        """))
+        a.root.append(act_with_schedule().root.find('{*}components'))
+        toc = a.table_of_contents()
+
+        detached = toc.detach()
+        assert_equal(len(detached), 6)
+        assert_equal(list(detached.parents), [-1, -1, 1, 2, 1, -1])
+        assert_equal(detached.types, ['section', 'chapter', 'part', 'section', 'section', 'doc'])
+        assert_equal(detached.subcomponents[3], 'section/2')
+        assert_equal(detached.children(), [0, 1, 5])
+        assert_equal(detached.children(1), [2, 4])
+        assert_equal(detached.children(0), [])
+        assert_equal(detached.title(2), 'Part A')
+        assert_equal(detached.title(5), 'A Title')
+
+        items = detached.items()
+        assert_is_none(items[1].element)
+        assert_equal([t.as_dict() for t in items], [t.as_dict() for t in toc])
+        assert_equal(detached.to_json(), toc.to_json())
+
+        copy = pickle.loads(pickle.dumps(detached, pickle.HIGHEST_PROTOCOL))
+        assert_equal(copy.to_json(), toc.to_json())
+        assert_equal(copy.parents, detached.parents)
+
+    def test_toc_cache(self):
+        a = act_with_schedule()
+        xml = a.to_xml()
+        expected = a.table_of_contents().to_json()
+
+        tocs = TOCCache()
+        assert_equal(tocs.json(xml), expected)
+        assert_equal(tocs.json(xml), expected)
+        assert_equal(tocs.json(xml.decode('utf-8')), expected)
+        assert_equal(tocs.cache.stats()['hits'], 2)
+
+        f = BytesIO()
+        tocs.write_json(a, f)
+        assert_equal(f.getvalue(), expected)
+
+        # changes to the document aren't served from the cache
+        a.title = 'Changed'
+        a.components()['schedule1'].meta.identification.FRBRWork.FRBRalias.set('value', 'Changed')
+        assert_not_equal(tocs.json(a), expected)
+
+        # stored on disk
+        tmp = tempfile.mkdtemp()
+        try:
+            TOCCache(Cache(path=tmp)).json(xml)
+            tocs = TOCCache(Cache(path=tmp))
+            assert_equal(tocs.json(xml), expected)
+            assert_equal(tocs.cache.stats()['disk_hits'], 1)
+        finally:
+            shutil.rmtree(tmp)
+
+COMPONENTS_DOCUMENT = """<?xml version="1.0"?>
+<akomaNtoso xmlns="http://www.akomantoso.org/2.0">
+  <act contains="originalVersion">
+    <meta>
+      <identification source="#cobalt">
+        <FRBRWork>
+          <FRBRthis value="/za/act/1900/1/main"/>
+          <FRBRuri value="/za/act/1900/1"/>
+          <FRBRalias value="Untitled"/>
+        </FRBRWork>
+      </identification>
+    </meta>
+    <body>
+      <section id="section-1"><content><p>hi</p></content></section>
+    </body>
+  </act>
+  <components>
+    <component id="component-1">
+      <doc name="schedule1">
+        <meta>
+          <identification source="#slaw">
+            <FRBRWork>
+              <FRBRthis value="/za/act/1900/1/schedule1"/>
+              <FRBRuri value="/za/act/1900/1"/>
+              <FRBRalias value="A Title"/>
+            </FRBRWork>
+          </identification>
+        </meta>
+        <mainBody><p>hi</p></mainBody>
+      </doc>
+    </component>
+  </components>
+</akomaNtoso>"""
+
+
+def act_with_schedule():
+    act = Act()
+    act.root.append(objectify.fromstring("""<components xmlns="http://www.akomantoso.org/2.0">
+  <component id="component-1">
+    <doc name="schedule1">
+      <meta>
+        <identification source="#cobalt">
+          <FRBRWork>
+            <FRBRthis value="/za/act/1900/1/schedule1"/>
+            <FRBRuri value="/za/act/1900/1"/>
+            <FRBRalias value="A Title"/>
+            <FRBRdate date="1900-01-01" name="Generation"/>
+            <FRBRauthor href="#council" as="#author"/>
+            <FRBRcountry value="za"/>
+          </FRBRWork>
+          <FRBRExpression>
+            <FRBRthis value="/za/act/1900/1/eng@/schedule1"/>
+            <FRBRuri value="/za/act/1900/1/eng@"/>
+            <FRBRdate date="1900-01-01" name="Generation"/>
+            <FRBRauthor href="#council" as="#author"/>
+            <FRBRlanguage language="eng"/>
+          </FRBRExpression>
+          <FRBRManifestation>
+            <FRBRthis value="/za/act/1900/1/eng@/schedule1"/>
+            <FRBRuri value="/za/act/1900/1/eng@"/>
+            <FRBRdate date="1900-01-01" name="Generation"/>
+            <FRBRauthor href="#council" as="#author"/>
+          </FRBRManifestation>
+        </identification>
+      </meta>
+      <mainBody>
+        <p>Schedule</p>
+      </mainBody>
+    </doc>
+  </component>
+</components>"""))
+    return act
+
 
 def act_fixture(content):
     return """<?xml version="1.0"?>
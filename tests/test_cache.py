@@ -0,0 +1,70 @@
+from unittest import TestCase
+from nose.tools import *  # noqa
+import os
+import shutil
+import tempfile
+
+from cobalt.cache import Cache, content_hash
+
+
+class CacheTestCase(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_content_hash(self):
+        assert_equal(content_hash('ab', 'c'), content_hash('ab', 'c'))
+        assert_equal(content_hash(u'caf\xe9'), content_hash(u'caf\xe9'.encode('utf-8')))
+        assert_not_equal(content_hash('ab', 'c'), content_hash('a', 'bc'))
+
+    def test_memory(self):
+        cache = Cache(max_bytes=10)
+        assert_is_none(cache.get('a'))
+
+        cache.set('a', 'aaaa')
+        cache.set('b', 'bbbb')
+        assert_equal(cache.get('a'), 'aaaa')
+
+        # b is the least recently used
+        cache.set('c', 'cccc')
+        assert_is_none(cache.get('b'))
+        assert_equal(cache.get('a'), 'aaaa')
+        assert_equal(cache.get('c'), 'cccc')
+
+        # too big to keep
+        cache.set('d', 'd' * 11)
+        assert_is_none(cache.get('d'))
+
+        assert_equal(cache.stats(), {
+            'hits': 3,
+            'memory_hits': 3,
+            'disk_hits': 0,
+            'misses': 3,
+            'evictions': 1,
+            'entries': 2,
+            'bytes': 8,
+        })
+
+    def check_store(self, path):
+        cache = Cache(max_bytes=10, path=path)
+        cache.set('a1', 'aaaa')
+        cache.set('b1', 'b' * 20)
+
+        cache = Cache(path=path)
+        assert_equal(cache.get('a1'), 'aaaa')
+        assert_equal(cache.get('b1'), 'b' * 20)
+        assert_equal(cache.get('a1'), 'aaaa')
+        assert_is_none(cache.get('c1'))
+        assert_equal(cache.stats()['disk_hits'], 2)
+        assert_equal(cache.stats()['memory_hits'], 1)
+
+        cache.clear()
+        assert_is_none(Cache(path=path).get('a1'))
+
+    def test_directory(self):
+        self.check_store(os.path.join(self.dir, 'html'))
+
+    def test_sqlite(self):
+        self.check_store(os.path.join(self.dir, 'html.sqlite'))
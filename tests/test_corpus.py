@@ -0,0 +1,73 @@
+from unittest import TestCase
+from nose.tools import *  # noqa
+from datetime import date
+import os
+import shutil
+import tempfile
+
+from cobalt.act import Act, AmendmentEvent
+from cobalt.corpus import scan, scan_file, find_files, metadata
+
+from .test_act import act_with_schedule
+
+
+class CorpusTestCase(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.dir, 'sub'))
+
+        for i, fname in enumerate(['a.xml', 'b.xml', 'sub/c.xml']):
+            act = Act()
+            act.title = "Act %s" % i
+            act.frbr_uri = '/za/act/2010/%s' % i
+            self.write(fname, act.to_xml())
+
+        self.write('sub/bad.xml', '<akomaNtoso')
+        self.write('sub/ignored.txt', 'hello')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, fname, content):
+        with open(os.path.join(self.dir, fname), 'w') as f:
+            f.write(content)
+
+    def test_find_files(self):
+        files = [os.path.relpath(f, self.dir) for f in find_files(self.dir)]
+        assert_equal(files, ['a.xml', 'b.xml', 'sub/bad.xml', 'sub/c.xml'])
+
+    def test_metadata(self):
+        act = Act()
+        act.frbr_uri = '/za/act/2010/1'
+        act.expression_date = '2012-01-01'
+        act.amendments = [AmendmentEvent(date='2012-01-01', amending_uri='/za/act/2011/1', amending_title="Foo")]
+
+        info = metadata(act)
+        assert_equal(info['frbr_uri'], '/za/act/2010/1')
+        assert_equal(info['expression_uri'], '/za/act/2010/1/eng@2012-01-01')
+        assert_equal(info['expression_date'], date(2012, 1, 1))
+        assert_equal(info['amendments'], [{'date': date(2012, 1, 1), 'amending_uri': '/za/act/2011/1', 'amending_title': 'Foo'}])
+        assert_is_none(info['repeal'])
+        assert_equal(info['components'], ['main'])
+
+    def test_scan_file(self):
+        self.write('components.xml', act_with_schedule().to_xml())
+        fname = os.path.join(self.dir, 'components.xml')
+
+        info = scan_file(fname)
+        assert_equal(info, dict(metadata(Act.from_file(fname, lean=True)), error=None, path=fname))
+        assert_equal(info['components'], ['main', 'schedule1'])
+
+    def test_scan(self):
+        for workers in [0, 2]:
+            records = list(scan(self.dir, workers=workers, chunksize=1))
+            assert_equal([r['title'] for r in records if not r['error']], ['Act 0', 'Act 1', 'Act 2'])
+
+            bad = records[2]
+            assert_true(bad['path'].endswith('bad.xml'))
+            assert_true(bad['error'].startswith('XMLSyntaxError'))
+
+    def test_scan_unordered(self):
+        records = list(scan([self.dir], workers=2, ordered=False))
+        assert_equal(sorted(r['frbr_uri'] for r in records if not r['error']),
+                     ['/za/act/2010/0', '/za/act/2010/1', '/za/act/2010/2'])
@@ -0,0 +1,57 @@
+from unittest import TestCase
+from nose.tools import *  # noqa
+
+from cobalt import instrument
+from cobalt.act import Act
+from cobalt.render import HTMLRenderer
+from cobalt.uri import FrbrUri
+
+
+class InstrumentTestCase(TestCase):
+    def setUp(self):
+        self.events = []
+        instrument.add_hook(self.events.append)
+
+    def tearDown(self):
+        instrument.remove_hook(self.events.append)
+        instrument.remove_hook(instrument.counters)
+        instrument.counters.reset()
+
+    def test_events(self):
+        xml = Act().to_xml()
+        act = Act(xml)
+        act.table_of_contents()
+        FrbrUri.parse('/za/act/1980/01')
+        html = HTMLRenderer().render(act.root)
+
+        names = [e.name for e in self.events]
+        for name in ['act.parse', 'toc.build', 'uri.parse', 'render']:
+            assert_in(name, names)
+
+        parse = self.events[names.index('act.parse')]
+        assert_equal(parse.size, len(xml))
+        assert_greater_equal(parse.duration, 0)
+        assert_equal(parse.elements, len(list(act.root.iter())))
+
+        render = self.events[names.index('render')]
+        assert_equal(render.size, len(html))
+
+    def test_no_hooks(self):
+        instrument.remove_hook(self.events.append)
+        Act()
+        FrbrUri.parse('/za/act/1980/01')
+        assert_equal(self.events, [])
+
+    def test_counters(self):
+        instrument.add_hook(instrument.counters)
+        FrbrUri.parse('/za/act/1980/01')
+        FrbrUri.parse('/za/act/1980/02')
+
+        stats = instrument.counters.as_dict()['uri.parse']
+        assert_equal(stats['count'], 2)
+        assert_equal(stats['size'], 30)
+        assert_greater_equal(stats['max_seconds'], 0)
+        assert_equal(sum(n for bound, n in stats['histogram']), 2)
+
+        instrument.counters.reset()
+        assert_equal(instrument.counters.as_dict(), {})
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+from nose.tools import *  # noqa
+import os
+import shutil
+import tempfile
+
+from lxml import etree
+
+from cobalt.act import Act
+from cobalt.uri import FrbrUri
+from cobalt.render import HTMLRenderer, CachedHTMLRenderer, compile_xslt, clear_xslt_cache
+
+XSLT = os.path.join(os.path.dirname(__file__), '..', 'cobalt', 'xsl', 'act.xsl')
+
+
+def make_act():
+    act = Act()
+    body = etree.fromstring(u"""<body xmlns="http://www.akomantoso.org/2.0">
+  <part id="part-1">
+    <num>1</num>
+    <heading>Introduction</heading>
+    <section id="section-1">
+      <num>1.</num>
+      <heading>Definitions</heading>
+      <content><p>In this Act, <b>caf\xe9</b> means a caf\xe9.</p></content>
+    </section>
+    <!-- a comment -->
+    <chapter id="part-1.chapter-1">
+      <num>1</num>
+      <heading>Application</heading>
+      <section id="section-2"><num>2.</num><content><p>Applies.</p></content></section>
+    </chapter>
+  </part>
+  <section id="section-3"><num>3.</num><heading>Short title</heading></section>
+</body>""")
+    act.body.getparent().replace(act.body, body)
+
+    components = act.root.makeelement('{%s}components' % act.namespace)
+    components.append(etree.fromstring("""<component xmlns="http://www.akomantoso.org/2.0" id="component-1">
+  <doc name="schedule1">
+    <meta>
+      <identification source="#cobalt">
+        <FRBRWork>
+          <FRBRthis value="/za/act/1900/1/schedule1"/>
+          <FRBRalias value="First Schedule"/>
+        </FRBRWork>
+      </identification>
+    </meta>
+    <mainBody>
+      <section id="schedule1.section-1"><content><p>Schedule text</p></content></section>
+    </mainBody>
+  </doc>
+</component>"""))
+    act.root.append(components)
+    return Act(etree.tostring(act.root, encoding='unicode'))
+
+
+class HTMLRendererTestCase(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        clear_xslt_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        clear_xslt_cache()
+
+    def copy_xslt(self, fname):
+        fname = os.path.join(self.dir, fname)
+        shutil.copy(XSLT, fname)
+        return fname
+
+    def test_render(self):
+        html = HTMLRenderer().render(Act().root)
+        assert_in('<article class="akn-act" data-contains="originalVersion">', html)
+        assert_in('<section class="akn-section" id="section-1">', html)
+
+    def test_compiled_once(self):
+        assert_is(HTMLRenderer().xslt, HTMLRenderer().xslt)
+
+    def test_recompile_when_changed(self):
+        fname = self.copy_xslt('act.xsl')
+        xslt = compile_xslt(fname)
+        assert_is(compile_xslt(fname), xslt)
+
+        os.utime(fname, (0, 0))
+        assert_is_not(compile_xslt(fname), xslt)
+
+    def test_set_xslt(self):
+        renderer = HTMLRenderer()
+        xslt = etree.XSLT(etree.XML(
+            '<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform">'
+            '<xsl:template match="/"><p>pinned</p></xsl:template>'
+            '</xsl:stylesheet>'))
+        renderer.xslt = xslt
+        assert_is(renderer.xslt, xslt)
+        assert_equal(renderer.render(Act().root), '<p>pinned</p>')
+
+    def test_render_doesnt_reload(self):
+        fname = self.copy_xslt('act.xsl')
+        renderer = HTMLRenderer(xslt_filename=fname)
+        xslt = renderer.xslt
+
+        # only the cached renderer checks for changes
+        os.utime(fname, (0, 0))
+        assert_is(renderer.xslt, xslt)
+        assert_is_not(CachedHTMLRenderer(xslt_filename=fname).xslt, xslt)
+
+    def test_find_xslt(self):
+        renderer = HTMLRenderer()
+        assert_raises(ValueError, renderer.find_xslt, xslt_dir=self.dir)
+
+        clear_xslt_cache()
+        self.copy_xslt('act.xsl')
+        self.copy_xslt('act_fre.xsl')
+        self.copy_xslt('act_by-law_za.xsl')
+
+        assert_equal(renderer.find_xslt(xslt_dir=self.dir), os.path.join(self.dir, 'act.xsl'))
+        assert_equal(renderer.find_xslt(language='fre', xslt_dir=self.dir), os.path.join(self.dir, 'act_fre.xsl'))
+        assert_equal(renderer.find_xslt(uri=FrbrUri.parse('/za/act/by-law/2010/1'), xslt_dir=self.dir),
+                     os.path.join(self.dir, 'act_by-law_za.xsl'))
+
+        renderer = HTMLRenderer(language='fre', xslt_dir=self.dir)
+        assert_equal(renderer.xslt_filename, os.path.join(self.dir, 'act_fre.xsl'))
+
+    def test_render_iter(self):
+        act = make_act()
+        renderer = HTMLRenderer()
+        html = renderer.render(act.root)
+        assert_in('<h2>First Schedule</h2>', html)
+
+        chunks = list(renderer.render_iter(act))
+        assert_equal(''.join(chunks), html)
+        # each top-level part and section, and the schedule, is separate
+        assert_true(any(c.startswith('<section class="akn-part" id="part-1">') for c in chunks))
+        assert_true(any(c.startswith('<section class="akn-section" id="section-3">') for c in chunks))
+        assert_true(any(c.startswith('<section class="akn-section" id="schedule1.section-1">') for c in chunks))
+
+    def test_render_iter_element(self):
+        act = make_act()
+        renderer = HTMLRenderer()
+        assert_equal(''.join(renderer.render_iter(act.body)), renderer.render(act.body))
+        assert_equal(list(renderer.render_iter(act.meta)), [renderer.render(act.meta)])
+
+    def test_render_subcomponent(self):
+        act = make_act()
+        renderer = HTMLRenderer()
+        html = renderer.render(act.root)
+
+        section = renderer.render_subcomponent(act, 'main', 'section/2')
+        assert_true(section.startswith('<section class="akn-section" id="section-2">'))
+        assert_in(section, html)
+
+        part = renderer.render_subcomponent(act, 'main', 'part/1')
+        assert_true(part.startswith('<section class="akn-part" id="part-1">'))
+        assert_in(section, part)
+        assert_in(part, html)
+
+        schedule = renderer.render_subcomponent(act, 'schedule1', None)
+        assert_true(schedule.startswith('<article class="akn-doc" data-name="schedule1"><h2>First Schedule</h2>'))
+        assert_in(schedule, html)
+
+        assert_is_none(renderer.render_subcomponent(act, 'main', 'section/99'))
+        assert_is_none(renderer.render_subcomponent(act, 'schedule9', None))
+
+    def test_render_many(self):
+        acts = [make_act(), Act()]
+        fname = os.path.join(self.dir, 'act.xml')
+        with open(fname, 'w') as f:
+            # blank text is ignored, as it is when loading an Act
+            f.write(etree.tostring(acts[0].root, pretty_print=True))
+
+        renderer = HTMLRenderer()
+        expected = [renderer.render(acts[0].root), renderer.render(acts[1].root), renderer.render(acts[0].root)]
+        items = acts + [fname]
+
+        for kwargs in [{'workers': 0}, {'workers': 2}, {'workers': 2, 'processes': True}]:
+            results = renderer.render_many(items, **kwargs)
+            assert_equal(list(results), expected)
+            assert_equal(results.count, 3)
+            assert_greater(results.rate, 0)
+
+            results = renderer.render_many(items, ordered=False, **kwargs)
+            assert_equal(sorted(results), list(enumerate(expected)))
+
+    def test_cached_renderer(self):
+        fname = self.copy_xslt('act.xsl')
+        renderer = CachedHTMLRenderer(xslt_filename=fname)
+        act = make_act()
+
+        html = renderer.render(act.root)
+        assert_equal(html, HTMLRenderer().render(act.root))
+        assert_equal(renderer.render(make_act().root), html)
+        assert_equal(renderer.cache.stats()['hits'], 1)
+
+        # changing the document or the stylesheet changes the key
+        key = renderer.cache_key(act.root)
+        act.title = 'Changed'
+        assert_not_equal(renderer.cache_key(act.root), key)
+        act.title = 'Untitled'
+        assert_equal(renderer.cache_key(act.root), key)
+
+        with open(fname, 'a') as f:
+            f.write('\n')
+        os.utime(fname, (0, 0))
+        assert_not_equal(renderer.cache_key(act.root), key)
@@ -0,0 +1,67 @@
+from unittest import TestCase
+from nose.tools import *  # noqa
+
+from cobalt.resolver import Resolver
+from cobalt.uri import FrbrUri
+
+
+class ResolverTestCase(TestCase):
+    def setUp(self):
+        self.resolver = Resolver()
+        self.resolver.add('/za-jhb/act/by-law/2003/public-health/eng@2010-01-01', 'a')
+        self.resolver.add('/za-jhb/act/by-law/2003/public-health/eng@2015-01-01', 'c')
+        self.resolver.add('/za-jhb/act/by-law/2003/public-health/eng@2012-06-01', 'b')
+        self.resolver.add('/za-jhb/act/by-law/2003/public-health/afr@2012-06-01', 'afr')
+
+    def test_exact(self):
+        assert_equal(self.resolver.resolve('/za-jhb/act/by-law/2003/public-health/eng@2012-06-01'), 'b')
+        assert_is_none(self.resolver.resolve('/za-jhb/act/by-law/2003/public-health/eng@2012-06-02'))
+        assert_equal(self.resolver.resolve('/za-jhb/act/by-law/2003/public-health/afr@2012-06-01'), 'afr')
+
+    def test_on_or_before(self):
+        r = self.resolver
+        assert_equal(r.resolve('/za-jhb/act/by-law/2003/public-health/eng:2012-06-01'), 'b')
+        assert_equal(r.resolve('/za-jhb/act/by-law/2003/public-health/eng:2014-12-31/main/part/A'), 'b')
+        assert_equal(r.resolve('/za-jhb/act/by-law/2003/public-health/eng:2020-01-01'), 'c')
+        assert_is_none(r.resolve('/za-jhb/act/by-law/2003/public-health/eng:2009-01-01'))
+
+    def test_latest(self):
+        r = self.resolver
+        assert_equal(r.resolve('/za-jhb/act/by-law/2003/public-health/eng@'), 'c')
+        assert_equal(r.resolve('/za-jhb/act/by-law/2003/public-health'), 'c')
+        assert_equal(r.resolve(FrbrUri.parse('/za-jhb/act/by-law/2003/public-health/afr')), 'afr')
+
+    def test_unknown(self):
+        r = self.resolver
+        assert_is_none(r.resolve('/za/act/by-law/2003/public-health'))
+        assert_is_none(r.resolve('/za-jhb/act/by-law/2003/public-health/fre'))
+        assert_equal(r.resolve('not a uri', 'default'), 'default')
+        assert_not_in('/za/act/2003/1', r)
+        assert_in('/za-jhb/act/by-law/2003/public-health', r)
+
+    def test_add_replace_and_remove(self):
+        r = self.resolver
+        assert_equal(len(r), 4)
+
+        r.add('/za-jhb/act/by-law/2003/public-health/eng@2012-06-01', 'b2')
+        assert_equal(len(r), 4)
+        assert_equal(r.resolve('/za-jhb/act/by-law/2003/public-health/eng:2013-01-01'), 'b2')
+
+        r.remove('/za-jhb/act/by-law/2003/public-health/eng@2012-06-01')
+        assert_equal(len(r), 3)
+        assert_equal(r.resolve('/za-jhb/act/by-law/2003/public-health/eng:2013-01-01'), 'a')
+        assert_equal(r.expressions('/za-jhb/act/by-law/2003/public-health/eng'),
+                     [('2010-01-01', 'a'), ('2015-01-01', 'c')])
+
+        with assert_raises(KeyError):
+            r.remove('/za-jhb/act/by-law/2003/public-health/eng@2012-06-01')
+
+        r.remove('/za-jhb/act/by-law/2003/public-health/afr@2012-06-01')
+        assert_is_none(r.resolve('/za-jhb/act/by-law/2003/public-health/afr'))
+        assert_equal(r.expressions('/za-jhb/act/by-law/2003/public-health/afr'), [])
+
+    def test_add_needs_date(self):
+        with assert_raises(ValueError):
+            self.resolver.add('/za/act/2003/1/eng', 'x')
+        with assert_raises(ValueError):
+            self.resolver.add('/za/act/2003/1/eng@', 'x')
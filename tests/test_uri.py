@@ -1,7 +1,8 @@
 from unittest import TestCase
 from nose.tools import *
+import pickle
 
-from cobalt.uri import FrbrUri
+from cobalt.uri import FrbrUri, FrozenFrbrUri
 
 class FrbrUriTestCase(TestCase):
     def test_bad_value(self):
@@ -225,3 +226,75 @@ class FrbrUriTestCase(TestCase):
         uri.format = 'html'
 
         assert_equal("/za/act/1980/02/eng@2014-01-01/main.html", uri.manifestation_uri())
+
+    def test_equality(self):
+        uri = FrbrUri.parse("/za/act/1980/01/eng@2012-01-01/main")
+        other = FrbrUri.parse("/za/act/1980/01/eng@2012-01-01/main")
+
+        assert_is_not(uri, other)
+        assert_equal(uri, other)
+        assert_equal(hash(uri), hash(other))
+        assert_equal({uri: 1}[other], 1)
+
+        other.language = 'fre'
+        assert_not_equal(uri, other)
+
+    def test_parse_returns_copies(self):
+        uri = FrbrUri.parse("/za/act/1980/01")
+        uri.number = '02'
+        assert_equal(FrbrUri.parse("/za/act/1980/01").number, '01')
+
+    def test_frozen(self):
+        uri = FrbrUri.parse("/za/act/1980/01/schedule1", frozen=True)
+        assert_is_instance(uri, FrozenFrbrUri)
+        assert_is(uri, FrbrUri.parse("/za/act/1980/01/schedule1", frozen=True))
+        assert_equal(uri.work_component, 'schedule1')
+
+        with assert_raises(AttributeError):
+            uri.number = '02'
+
+        clone = uri.clone()
+        assert_not_is_instance(clone, FrozenFrbrUri)
+        assert_equal(clone, uri)
+        assert_equal(clone.work_component, 'schedule1')
+        assert_equal(clone.freeze(), uri)
+
+    def test_pickle(self):
+        for uri in [FrbrUri.parse("/za/act/1980/01/eng:2012-01-01"), FrbrUri.parse("/za/act/1980/01", frozen=True)]:
+            for protocol in [0, 2]:
+                copy = pickle.loads(pickle.dumps(uri, protocol))
+                assert_equal(copy, uri)
+                assert_is(copy.__class__, uri.__class__)
+
+    def test_parse_many(self):
+        columns = FrbrUri.parse_many([
+            "/za/act/1980/01",
+            "/za-jhb/act/by-law/2003/public-health/afr@2015-01-01/main/part/A",
+            "/za/act/1980/01/eng/main.xml",
+            "bad",
+        ])
+
+        assert_equal(len(columns), 4)
+        assert_equal(columns.valid, [True, True, True, False])
+        assert_equal(columns.country, ['za', 'za', 'za', None])
+        assert_equal(columns.locality, [None, 'jhb', None, None])
+        assert_equal(columns.language, ['eng', 'afr', 'eng', None])
+        assert_equal(columns.expression_date, [None, '@2015-01-01', None, None])
+        assert_equal(columns.format, [None, None, 'xml', None])
+
+        assert_equal(columns[1], FrbrUri.parse("/za-jhb/act/by-law/2003/public-health/afr@2015-01-01/main/part/A"))
+        assert_is_none(columns[3])
+
+    def test_parse_many_not_strings(self):
+        columns = FrbrUri.parse_many(["/za/act/1980/01", None, 5, "bad", u"/za/act/1980/02"])
+
+        assert_equal(len(columns), 5)
+        assert_equal(columns.valid, [True, False, False, False, True])
+        assert_equal(columns.number, ['01', None, None, None, '02'])
+        assert_is_none(columns[1])
+        assert_is_none(columns[2])
+
+    def test_parse_many_empty(self):
+        columns = FrbrUri.parse_many([])
+        assert_equal(len(columns), 0)
+        assert_equal(columns.number, [])
@@ -0,0 +1,37 @@
+from unittest import TestCase
+from nose.tools import *  # noqa
+
+from cobalt.act import Act, AmendmentEvent
+from cobalt.xpath import xpaths
+
+
+class XPathTestCase(TestCase):
+    def test_shared(self):
+        a = Act()
+        assert_is(xpaths(a.namespace), xpaths('http://www.akomantoso.org/2.0'))
+        assert_is_not(xpaths(a.namespace), xpaths('http://docs.oasis-open.org/legaldocml/ns/akn/3.0'))
+
+    def test_expressions(self):
+        a = Act()
+        a.amendments = [AmendmentEvent(date='2012-02-01', amending_uri='/za/act/1980/10', amending_title="Foo")]
+        paths = xpaths(a.namespace)
+
+        assert_is(paths.first(paths.act, a.root), a.act)
+        assert_equal(paths.component_name(a.act), ['/za/act/1900/1/main'])
+        assert_equal([e.get('id') for e in paths.events(a.meta, type='amendment')], ['amendment-2012-02-01'])
+        assert_equal(paths.events(a.meta, type='repeal'), [])
+
+        references = a.meta.references
+        assert_equal(paths.first(paths.reference, references, tag='passiveRef', id='amendment-0-source').get('href'),
+                     '/za/act/1980/10')
+        assert_is_none(paths.first(paths.reference, references, tag='TLCOrganization', id='amendment-0-source'))
+
+        # results are plain strings
+        assert_is(type(paths.alias(a.act)[0]), str)
+
+    def test_path(self):
+        a = Act()
+        paths = xpaths(a.namespace)
+        assert_is(paths.path('identification.FRBRWork'), paths.path('identification.FRBRWork'))
+        assert_equal(paths.first(paths.path('identification.FRBRWork.FRBRuri'), a.meta).get('value'), '/za/act/1900/1')
+        assert_is_none(paths.first(paths.path('identification.FRBRWork.missing'), a.meta))